@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+# The script being benchmarked
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "csl-translation-status-output.py")
+
+# Extra term forms and genders that occur in the real CSL locales
+EXTRA_FORMS = ["short", "verb", "verb-short", "symbol"]
+GENDERS = ["", "", "", "masculine", "feminine"]
+
+def load_status_module():
+    spec = importlib.util.spec_from_file_location("csl_translation_status", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def synthetic_terms(term_count: int, rng: random.Random) -> List[Dict]:
+    """Build term definitions shaped like the en-US locale: plain, plural and gendered terms in several forms."""
+    terms = []
+    name_index = 0
+    forms = []
+    for i in range(term_count):
+        if not forms:
+            # Most terms only have the long form; some also come in short, verb or symbol forms
+            name_index += 1
+            forms = [""] + rng.sample(EXTRA_FORMS, rng.choice([0, 0, 0, 1, 2]))
+        terms.append({
+            "name": f"term-{name_index}",
+            "form": forms.pop(0),
+            "gender": rng.choice(GENDERS),
+            "plural": rng.random() < 0.3,
+            "text": f"english text {i}",
+        })
+    return terms
+
+def synthetic_locale_xml(lang_code: str, terms: List[Dict], translated_share: float, rng: random.Random) -> str:
+    """Render a locale file in the CSL locale schema with roughly translated_share of its terms translated."""
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        f'<locale xmlns="http://purl.org/net/xbiblio/csl" version="1.0" xml:lang="{lang_code}">',
+        "  <info>",
+        "    <translator>",
+        "      <name>Synthetic Translator</name>",
+        "    </translator>",
+        '    <rights license="http://creativecommons.org/licenses/by-sa/3.0/">This work is licensed under a '
+        "Creative Commons Attribution-ShareAlike 3.0 License</rights>",
+        "    <updated>2025-01-01T00:00:00+00:00</updated>",
+        "  </info>",
+        '  <style-options punctuation-in-quote="false"/>',
+        '  <date form="text">',
+        '    <date-part name="month" suffix=" "/>',
+        '    <date-part name="day" suffix=", "/>',
+        '    <date-part name="year"/>',
+        "  </date>",
+        "  <terms>",
+    ]
+    for term in terms:
+        text = term["text"]
+        if lang_code != "en-US" and rng.random() < translated_share:
+            text = f"{lang_code} {text}"
+        attributes = f' name="{term["name"]}"'
+        if term["form"]:
+            attributes += f' form="{term["form"]}"'
+        if term["gender"]:
+            attributes += f' gender="{term["gender"]}"'
+        if term["plural"]:
+            lines.append(f"    <term{attributes}>")
+            lines.append(f"      <single>{escape(text)}</single>")
+            lines.append(f"      <multiple>{escape(text)}s</multiple>")
+            lines.append("    </term>")
+        else:
+            lines.append(f"    <term{attributes}>{escape(text)}</term>")
+    lines += ["  </terms>", "</locale>", ""]
+    return "\n".join(lines)
+
+def write_synthetic_locales(directory: str, locale_count: int, term_count: int, seed: int) -> List[str]:
+    """Write en-US plus locale_count synthetic locales into directory and return their codes."""
+    rng = random.Random(seed)
+    terms = synthetic_terms(term_count, rng)
+    codes = ["en-US"] + [f"x{i:04d}-ZZ" for i in range(locale_count)]
+    for lang_code in codes:
+        with open(os.path.join(directory, f"locales-{lang_code}.xml"), "w", encoding="utf-8") as f:
+            f.write(synthetic_locale_xml(lang_code, terms, rng.uniform(0.2, 1.0), rng))
+    return codes
+
+def timed(stages: Dict, name: str, function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    stages[name] = round(time.perf_counter() - start, 6)
+    return value
+
+def benchmark(status, locale_count: int, term_count: int, parser_name: str, seed: int) -> Dict:
+    """Time discovery, loading, parsing, comparison and page generation for one synthetic data set.
+
+    The whole script is then run once more over the same directory (--locales-dir, no caches)
+    to measure the pipeline end to end, with its stages overlapping.
+    """
+    with tempfile.TemporaryDirectory(prefix="csl-bench-") as workdir:
+        locales_dir = os.path.join(workdir, "locales")
+        os.makedirs(locales_dir)
+        start = time.perf_counter()
+        write_synthetic_locales(locales_dir, locale_count, term_count, seed)
+        generate_seconds = round(time.perf_counter() - start, 6)
+        parse = status.PARSERS[parser_name]
+        stages = {}
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                codes = timed(stages, "discovery", status.find_local_locale_codes, locales_dir)
+                xml_by_code = timed(stages, "load", lambda: {code: status.read_local_xml(locales_dir, code)
+                                                             for code in codes})
+                terms_by_code = timed(stages, "parse", lambda: {code: parse(xml)
+                                                                for code, xml in xml_by_code.items()})
+                english_terms = terms_by_code.pop("en-US")
+                total_terms = len(english_terms)
+                reference = timed(stages, "reference", status.build_reference_index, english_terms)
+                untranslated = timed(stages, "compare", lambda: {
+                    code: status.find_untranslated_terms(reference, terms) for code, terms in terms_by_code.items()})
+                results = [status.build_result(code, terms, total_terms) for code, terms in untranslated.items()]
+                timed(stages, "render_locales", lambda: [
+                    status.generate_locale_page(res["lang_code"], res["language"], res["untranslated_terms"],
+                                                total_terms) for res in results])
+                results.sort(key=lambda x: (-x["percentage"], x["lang_code"]))
+                timed(stages, "render_index", status.generate_index_page, results)
+                start = time.perf_counter()
+                status.main(["--locales-dir", locales_dir, "--no-cache", "--parser", parser_name])
+                end_to_end_seconds = round(time.perf_counter() - start, 6)
+        finally:
+            os.chdir(previous_cwd)
+        xml_bytes = sum(len(xml.encode("utf-8")) for xml in xml_by_code.values())
+    return {
+        "locales": locale_count,
+        "terms": term_count,
+        "parser": parser_name,
+        "xml_bytes": xml_bytes,
+        "generate_seconds": generate_seconds,
+        "stages": stages,
+        "total_seconds": round(sum(stages.values()), 6),
+        "end_to_end_seconds": end_to_end_seconds,
+    }
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the CSL translation status pipeline on synthetic locales, without network access.")
+    parser.add_argument("--locales", type=int, nargs="+", default=[60],
+                        help="numbers of non-English locales to generate (default: 60)")
+    parser.add_argument("--terms", type=int, nargs="+", default=[400],
+                        help="numbers of terms per locale (default: 400)")
+    parser.add_argument("--parser", nargs="+", default=["dom"], choices=["dom", "stream"],
+                        help="parsers to benchmark (default: dom)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per combination; the fastest time of each stage is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic data (default: 1)")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] | None = None):
+    args = parse_args(argv)
+    status = load_status_module()
+    runs = []
+    for locale_count in args.locales:
+        for term_count in args.terms:
+            for parser_name in args.parser:
+                repeats = [benchmark(status, locale_count, term_count, parser_name, args.seed)
+                           for _ in range(max(1, args.repeat))]
+                best = repeats[0]
+                best["stages"] = {stage: min(run["stages"][stage] for run in repeats) for stage in best["stages"]}
+                best["total_seconds"] = round(sum(best["stages"].values()), 6)
+                best["end_to_end_seconds"] = min(run["end_to_end_seconds"] for run in repeats)
+                runs.append(best)
+                print(f"{locale_count} locales x {term_count} terms ({parser_name}): "
+                      f"{best['total_seconds']:.3f}s by stage, {best['end_to_end_seconds']:.3f}s end to end",
+                      file=sys.stderr)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
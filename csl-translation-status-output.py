@@ -1,13 +1,122 @@
 import requests
+from requests.adapters import HTTPAdapter
 import xml.etree.ElementTree as ET
 import re
 import os
-from typing import Dict, List, Tuple
-from datetime import datetime
+import json
+import hashlib
+import gzip
+import glob
+import io
+import tarfile
+import zipfile
+import zlib
+import argparse
+import asyncio
+import base64
+import itertools
+import multiprocessing
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import brotli  # optional, only used to write .br copies of output files
+except ImportError:
+    brotli = None
 
 # Define the base URL for fetching locale XML
 BASE_URL = "https://raw.githubusercontent.com/citation-style-language/locales/master/locales-{}.xml"
 
+# GitHub API endpoints for locale discovery: the root git tree (one request, with blob SHAs)
+# and the contents listing it falls back to
+TREES_API_URL = "https://api.github.com/repos/citation-style-language/locales/git/trees/master"
+CONTENTS_API_URL = "https://api.github.com/repos/citation-style-language/locales/contents"
+
+# Archive of the whole locales repository, used by --archive when no path is given
+ARCHIVE_URL = "https://github.com/citation-style-language/locales/archive/refs/heads/master.tar.gz"
+
+# XML namespace of CSL locale files
+CSL_NS = '{http://purl.org/net/xbiblio/csl}'
+
+# Characters fed to the streaming parser at a time
+PARSE_CHUNK_SIZE = 64 * 1024
+
+# Locale file names in the CSL locales repository, e.g. locales-de-DE.xml
+LOCALE_FILE_PATTERN = re.compile(r'^locales-([a-zA-Z0-9\-]+)\.xml$')
+
+# Maximum number of locale files fetched in parallel
+MAX_WORKERS = 8
+
+# Shared HTTP client settings; timeouts are (connect, read) in seconds
+HTTP_TIMEOUT = (10, 30)
+HTTP_HEADERS = {"Accept-Encoding": "gzip, deflate", "User-Agent": "csl-translation-status"}
+
+# Request pacing (token bucket: sustained requests per second and burst size) and retries
+REQUEST_RATE = 20.0
+REQUEST_BURST = 10
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0  # seconds before the first retry, doubled (with jitter) for each further one
+MAX_RATE_LIMIT_WAIT = 900  # give up instead of waiting longer than this for a rate limit reset
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bounds (seconds) of the HTTP latency histogram buckets
+HTTP_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response headers kept by --record; the rest only matter to the transport
+RECORD_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Retry-After",
+                  "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "X-RateLimit-Used")
+
+# On-disk cache for conditional GETs (ETag/Last-Modified), reused across runs
+CACHE_DIR = ".cache"
+
+# Parsed locales kept under <cache-dir>/parsed, least recently used evicted first
+PARSE_CACHE_MAX_ENTRIES = 1000
+
+# Per-page input/output hashes from the last run, used to skip rewriting unchanged pages
+MANIFEST_PATH = "docs/manifest.json"
+
+# Bump whenever the page or index templates change, so that manifest entries rendered by older templates are redone
+PAGE_TEMPLATE_VERSION = 1
+
+# Set in each analysis worker (process or thread) by _init_analysis_worker()
+_worker_state: Dict = {}
+
+# Stage each thread is currently in (thread id -> stage name), read by StackSampler
+_thread_stages: Dict[int, str] = {}
+
+# Seconds between two samples of --profile
+PROFILE_INTERVAL = 0.005
+
+# Machine-readable copies of the results, written next to the HTML pages
+SUMMARY_JSON_PATH = "docs/data/summary.json"
+TERMS_NDJSON_PATH = "docs/data/terms.ndjson"
+
+# Locales buffered between pipeline stages before a slower stage holds the faster one back
+PIPELINE_QUEUE_SIZE = 16
+
+# Per-stage timings of the last run, written next to docs/ (see RunMetrics)
+RUN_REPORT_PATH = "run-report.json"
+
+# Default output of --backfill, one JSON record per locale per commit
+BACKFILL_OUTPUT = "history.ndjson"
+
+_session: requests.Session | None = None
+_scheduler: "RequestScheduler | None" = None
+_timeout: Tuple[float, float] = HTTP_TIMEOUT
+_http_cache_dir: str | None = None
+_endpoint: str | None = None
+_recorder: "ResponseRecorder | None" = None
+
 # Simple mapping for language codes to human-readable names (extensible)
 LANG_NAMES = {
     "af-ZA": "Afrikaans", "ar": "Arabic", "bal-PK": "Balochi (Pakistan)", "bg-BG": "Bulgarian",
@@ -28,40 +137,367 @@ LANG_NAMES = {
     "fr-CA": "French (Canada)", "pt-BR": "Portuguese (Brazil)", "zh-TW": "Chinese (Taiwan)"
 }
 
+class RequestScheduler:
+    """Paces requests with a token bucket, honours rate-limit headers and retries transient failures.
+
+    The counters and the last rate-limit headers seen per host are public so the rest of the
+    run can report on them; state() returns a snapshot.
+    """
+
+    def __init__(self, rate: float = REQUEST_RATE, burst: int = REQUEST_BURST, max_retries: int = MAX_RETRIES,
+                 backoff: float = RETRY_BACKOFF, max_wait: float = MAX_RATE_LIMIT_WAIT):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0  # wall time during which at least one request was held back
+        self.bytes_received = 0
+        self.statuses: Dict[int, int] = {}
+        self.latency_seconds = 0.0
+        self.latency_buckets = [0] * len(HTTP_LATENCY_BUCKETS)  # per bucket, not cumulative
+        self.rate_limits: Dict[str, Dict[str, int]] = {}
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until: Dict[str, float] = {}
+        self._waiting = 0
+        self._waiting_since = 0.0
+        self._lock = threading.Lock()
+
+    def add_bytes(self, nbytes: int):
+        with self._lock:
+            self.bytes_received += nbytes
+
+    def state(self) -> Dict:
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries, "failures": self.failures,
+                    "throttled_seconds": round(self.throttled_seconds, 3), "bytes_received": self.bytes_received,
+                    "statuses": dict(sorted(self.statuses.items())), "latency_seconds": round(self.latency_seconds, 6),
+                    "latency_buckets": dict(zip(HTTP_LATENCY_BUCKETS, self.latency_buckets)),
+                    "rate_limits": {host: dict(limits) for host, limits in self.rate_limits.items()}}
+
+    def _acquire(self, host: str):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until.get(host, now) - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.requests += 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                if not self._waiting:
+                    self._waiting_since = now
+                self._waiting += 1
+            time.sleep(wait)
+            with self._lock:
+                self._waiting -= 1
+                if not self._waiting:
+                    self.throttled_seconds += time.monotonic() - self._waiting_since
+
+    def _record_latency(self, seconds: float):
+        with self._lock:
+            self.latency_seconds += seconds
+            for i, bound in enumerate(HTTP_LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+
+    def _retry_delay(self, host: str, response: requests.Response) -> float | None:
+        """Record rate-limit headers and return how long the server asked us to wait, if it did."""
+        headers = response.headers
+        delay = None
+        if "X-RateLimit-Remaining" in headers:
+            limits = {key: int(headers[f"X-RateLimit-{key.title()}"]) for key in ("limit", "remaining", "reset")
+                      if headers.get(f"X-RateLimit-{key.title()}", "").isdigit()}
+            with self._lock:
+                self.rate_limits[host] = limits
+            if limits.get("remaining") == 0 and "reset" in limits:
+                delay = max(limits["reset"] - time.time(), 0) + 1
+        if headers.get("Retry-After", "").isdigit():
+            delay = float(headers["Retry-After"])
+        if delay is not None and delay <= self.max_wait:
+            with self._lock:
+                self._paused_until[host] = max(self._paused_until.get(host, 0), time.monotonic() + delay)
+        return delay
+
+    def request(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        for attempt in itertools.count():
+            self._acquire(host)
+            last_attempt = attempt >= self.max_retries
+            try:
+                start = time.perf_counter()
+                response = session.request(method, url, **kwargs)
+                self._record_latency(time.perf_counter() - start)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = None
+            else:
+                # Body bytes as read off the wire, before gzip decoding; streamed bodies are counted
+                # by whoever reads them, through add_bytes()
+                with self._lock:
+                    self.bytes_received += 0 if kwargs.get("stream") else response.raw.tell()
+                    self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+                delay = self._retry_delay(host, response)
+                rate_limited = response.status_code in (403, 429) and delay is not None
+                retryable = response.status_code in RETRY_STATUSES or rate_limited
+                if not retryable or last_attempt or (delay or 0) > self.max_wait:
+                    if response.status_code >= 400:
+                        with self._lock:
+                            self.failures += 1
+                    return response
+                response.close()
+            with self._lock:
+                self.retries += 1
+            if delay is None:
+                # Host pauses from rate-limit headers are applied in _acquire(); otherwise back off
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+class ResponseRecorder:
+    """Collects the responses seen by http_get() into a snapshot the replay server can serve."""
+
+    def __init__(self):
+        self.responses: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, response: requests.Response):
+        # Server errors and rate limits are what the replay server injects; replaying a recorded
+        # one would fail that path for good
+        if response.status_code >= 500 or response.status_code in (403, 429):
+            return
+        parts = urlsplit(response.url)
+        entry = {
+            "path": urlunsplit(("", "", parts.path, parts.query, "")),
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORD_HEADERS if name in response.headers},
+        }
+        try:
+            entry["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_base64"] = base64.b64encode(response.content).decode("ascii")
+        with self._lock:
+            previous = self.responses.get(entry["path"])
+            if previous is None or entry["status"] < 400 or previous["status"] >= 400:
+                self.responses[entry["path"]] = entry  # never replace a success with a failure
+
+    def save(self, path: str):
+        """Write the snapshot as gzipped JSON, one entry per path, sorted so reruns diff cleanly."""
+        with self._lock:
+            snapshot = {"recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                        "responses": [self.responses[key] for key in sorted(self.responses)]}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _write_atomic(path, gzip.compress(json.dumps(snapshot, ensure_ascii=False).encode("utf-8"), mtime=0))
+
+def configure_http(pool_size: int = MAX_WORKERS, timeout: Tuple[float, float] = HTTP_TIMEOUT,
+                   cache_dir: str | None = None, scheduler: RequestScheduler | None = None,
+                   endpoint: str | None = None, recorder: ResponseRecorder | None = None):
+    """Create the shared keep-alive session that every network call goes through.
+
+    With an endpoint (scheme://host[:port]) every request goes to that host instead of GitHub,
+    e.g. a replay server; with a recorder every response is also added to it.
+    """
+    global _session, _scheduler, _timeout, _http_cache_dir, _endpoint, _recorder
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HTTP_HEADERS)
+    _session = session
+    _scheduler = scheduler or RequestScheduler()
+    _timeout = timeout
+    _http_cache_dir = os.path.join(cache_dir, "http") if cache_dir else None
+    if _http_cache_dir:
+        os.makedirs(_http_cache_dir, exist_ok=True)
+    _endpoint = endpoint.rstrip("/") if endpoint else None
+    _recorder = recorder
+
+def _resolve_url(url: str) -> str:
+    if not _endpoint:
+        return url
+    parts = urlsplit(url)
+    return _endpoint + urlunsplit(("", "", parts.path, parts.query, ""))
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """GET a URL through the shared connection pool and request scheduler."""
+    if _session is None:
+        configure_http()
+    kwargs.setdefault("timeout", _timeout)
+    response = _scheduler.request(_session, "GET", _resolve_url(url), **kwargs)
+    if _recorder is not None and not kwargs.get("stream"):
+        _recorder.add(response)
+    return response
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def fetch_text(url: str, params: Dict[str, str] | None = None) -> str:
+    """GET a URL and return its body, revalidating against the on-disk cache when enabled."""
+    if not _http_cache_dir:
+        response = http_get(url, params=params)
+        response.raise_for_status()
+        return response.text
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    cache_path = os.path.join(_http_cache_dir, hashlib.sha256(full_url.encode("utf-8")).hexdigest())
+    meta = None
+    if os.path.exists(cache_path + ".json") and os.path.exists(cache_path + ".body"):
+        with open(cache_path + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    response = http_get(full_url, headers=headers)
+    if response.status_code == 304 and meta:
+        with open(cache_path + ".body", "rb") as f:
+            return f.read().decode(meta.get("encoding") or "utf-8", errors="replace")
+    response.raise_for_status()
+    if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+        _write_atomic(cache_path + ".body", response.content)
+        _write_atomic(cache_path + ".json", json.dumps({
+            "url": full_url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+        }).encode("utf-8"))
+    return response.text
+
 def fetch_locale_codes() -> List[str]:
     """Fetch the list of locale codes dynamically from GitHub repo."""
-    api_url = "https://api.github.com/repos/citation-style-language/locales/contents"
     params = {"ref": "master"}
     try:
-        response = requests.get(api_url, params=params)
-        response.raise_for_status()
-        files = response.json()
-        pattern = re.compile(r'^locales-([a-zA-Z0-9\-]+)\.xml$')
+        files = json.loads(fetch_text(CONTENTS_API_URL, params=params))
         locale_codes = []
         for file_info in files:
             if file_info["type"] == "file":
-                match = pattern.match(file_info["name"])
+                match = LOCALE_FILE_PATTERN.match(file_info["name"])
                 if match:
                     locale_codes.append(match.group(1))
         print(f"Found {len(locale_codes)} locale files via GitHub API.")
         return sorted(set(locale_codes))
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Error fetching locale list: {e}")
         return []
 
+def fetch_locale_tree() -> Dict[str, str] | None:
+    """Map locale codes to blob SHAs with a single git-trees request.
+
+    Returns None if the request fails or GitHub truncated the tree, so callers can fall back
+    to fetch_locale_codes().
+    """
+    try:
+        tree = json.loads(fetch_text(TREES_API_URL))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error fetching locale tree: {e}")
+        return None
+    if tree.get("truncated"):
+        print("Locale tree was truncated by GitHub.")
+        return None
+    blob_shas = {}
+    for entry in tree.get("tree", []):
+        match = LOCALE_FILE_PATTERN.match(entry["path"])
+        if entry["type"] == "blob" and match:
+            blob_shas[match.group(1)] = entry["sha"]
+    print(f"Found {len(blob_shas)} locale files via GitHub git trees API.")
+    return blob_shas
+
+def find_local_locale_codes(locales_dir: str) -> List[str]:
+    """List locale codes from the locales-*.xml files in a local directory."""
+    locale_codes = []
+    for path in glob.glob(os.path.join(locales_dir, "locales-*.xml")):
+        match = LOCALE_FILE_PATTERN.match(os.path.basename(path))
+        if match:
+            locale_codes.append(match.group(1))
+    print(f"Found {len(locale_codes)} locale files in {locales_dir}.")
+    return sorted(locale_codes)
+
+def read_local_xml(locales_dir: str, lang_code: str) -> str | None:
+    path = os.path.join(locales_dir, f"locales-{lang_code}.xml")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error reading {lang_code}: {e}")
+        return None
+
+def read_locale_archive(source: str) -> Dict[str, str]:
+    """Read every top-level locales-*.xml from a tar.gz or zip archive (path or URL) without extracting it."""
+    xml_by_code = {}
+
+    def add_member(member_name: str, data: bytes):
+        parts = member_name.strip("/").split("/")
+        match = LOCALE_FILE_PATTERN.match(parts[-1])
+        # Repository archives wrap everything in a single top-level directory
+        if match and len(parts) <= 2:
+            try:
+                xml_by_code[match.group(1)] = data.decode("utf-8")
+            except UnicodeDecodeError as e:
+                print(f"Skipping {member_name}: {e}")
+
+    try:
+        if source.startswith(("http://", "https://")):
+            response = http_get(source, stream=True)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Zip needs random access to its central directory; tarballs are read straight off the socket
+            is_zip = source.endswith(".zip") or "/zip/" in source
+            stream = io.BytesIO(response.content) if is_zip else response.raw
+        else:
+            stream = open(source, "rb")
+            is_zip = zipfile.is_zipfile(stream)
+            stream.seek(0)
+        with stream:
+            if is_zip:
+                with zipfile.ZipFile(stream) as archive:
+                    for info in archive.infolist():
+                        if not info.is_dir():
+                            add_member(info.filename, archive.read(info))
+            else:
+                with tarfile.open(fileobj=stream, mode="r|*") as archive:
+                    for member in archive:
+                        if member.isfile() and LOCALE_FILE_PATTERN.match(os.path.basename(member.name)):
+                            add_member(member.name, archive.extractfile(member).read())
+        if source.startswith(("http://", "https://")):
+            _scheduler.add_bytes(response.raw.tell())
+    except (requests.exceptions.RequestException, OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        print(f"Error reading locale archive {source}: {e}")
+        return {}
+    print(f"Found {len(xml_by_code)} locale files in {source}.")
+    return xml_by_code
+
 def get_language_name(lang_code: str) -> str:
     return LANG_NAMES.get(lang_code, lang_code)
 
 def fetch_xml_content(lang_code: str) -> str | None:
     url = BASE_URL.format(lang_code)
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.text
+        return fetch_text(url)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {lang_code}: {e}")
         return None
 
+def _term_value(term: ET.Element) -> str | Tuple[str, str]:
+    single_tag = term.find(f'{CSL_NS}single')
+    multiple_tag = term.find(f'{CSL_NS}multiple')
+    if single_tag is not None and multiple_tag is not None:
+        single_text = single_tag.text.strip() if single_tag.text else ''
+        multiple_text = multiple_tag.text.strip() if multiple_tag.text else ''
+        return (single_text, multiple_text)
+    return term.text.strip() if term.text else ''
+
 def parse_locale_terms(xml_string: str) -> Dict[Tuple[str, str], str | Tuple[str, str]]:
     """Parse XML string and return dict of terms."""
     if not xml_string:
@@ -69,29 +505,405 @@ def parse_locale_terms(xml_string: str) -> Dict[Tuple[str, str], str | Tuple[str
     terms = {}
     try:
         root = ET.fromstring(xml_string)
-        namespace = '{http://purl.org/net/xbiblio/csl}'
-        term_elements = root.findall(f'{namespace}terms/{namespace}term')
-        for term in term_elements:
-            name = term.get('name', '')
-            form = term.get('form', '')
-            single_tag = term.find(f'{namespace}single')
-            multiple_tag = term.find(f'{namespace}multiple')
-            if single_tag is not None and multiple_tag is not None:
-                single_text = single_tag.text.strip() if single_tag.text else ''
-                multiple_text = multiple_tag.text.strip() if multiple_tag.text else ''
-                terms[(name, form)] = (single_text, multiple_text)
-            else:
-                terms[(name, form)] = term.text.strip() if term.text else ''
+        for term in root.findall(f'{CSL_NS}terms/{CSL_NS}term'):
+            terms[(term.get('name', ''), term.get('form', ''))] = _term_value(term)
     except ET.ParseError as e:
         print(f"Error parsing XML: {e}")
         return {}
     return terms
 
-def generate_locale_page(lang_code: str, lang_name: str, untranslated_terms: List[Dict], total_terms: int):
-    """Generate per-locale HTML page."""
-    os.makedirs("docs/locales", exist_ok=True)
+def parse_locale_terms_streaming(xml_string: str) -> Dict[Tuple[str, str], str | Tuple[str, str]]:
+    """Parse XML string incrementally, keeping at most one term subtree in memory."""
+    if not xml_string:
+        return {}
+    terms = {}
+    parser = ET.XMLPullParser(events=("start", "end"))
+    term_tag, terms_tag = f'{CSL_NS}term', f'{CSL_NS}terms'
+    path = []
+    try:
+        for offset in range(0, len(xml_string), PARSE_CHUNK_SIZE):
+            parser.feed(xml_string[offset:offset + PARSE_CHUNK_SIZE])
+            for event, elem in parser.read_events():
+                if event == "start":
+                    path.append(elem)
+                    continue
+                path.pop()
+                # Same selection as findall('terms/term') on the root: path is now [root, terms]
+                if elem.tag == term_tag and len(path) == 2 and path[1].tag == terms_tag:
+                    terms[(elem.get('name', ''), elem.get('form', ''))] = _term_value(elem)
+                # Drop finished top-level sections and terms so the tree never grows past one of them
+                if 1 <= len(path) <= 2:
+                    path[-1].remove(elem)
+        parser.close()
+    except ET.ParseError as e:
+        print(f"Error parsing XML: {e}")
+        return {}
+    return terms
+
+# Selectable with --parser
+PARSERS = {"dom": parse_locale_terms, "stream": parse_locale_terms_streaming}
+
+def git_blob_sha(xml_string: str) -> str:
+    """Return the git blob SHA of a locale file, the same id GitHub reports for it."""
+    data = xml_string.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def load_cached_terms(cache_dir: str, blob_sha: str) -> Dict[Tuple[str, str], str | Tuple[str, str]] | None:
+    """Return the parsed terms stored for a blob SHA, or None if that blob was never parsed."""
+    cache_path = os.path.join(cache_dir, "parsed", f"{blob_sha}.json")
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            entries = json.load(f)
+        os.utime(cache_path)  # mark as recently used for eviction
+    except (OSError, ValueError):
+        return None
+    return {(name, form): tuple(value) if isinstance(value, list) else value for name, form, value in entries}
+
+def load_locale_terms(xml_string: str, parse=parse_locale_terms, cache_dir: str | None = None,
+                      counts: Dict[str, int] | None = None) -> Dict[Tuple[str, str], str | Tuple[str, str]]:
+    """Parse locale XML, reusing the stored result when identical content was parsed before.
+
+    Cache hits and misses are added to `counts`, if given.
+    """
+    if not cache_dir or not xml_string:
+        return parse(xml_string)
+    blob_sha = git_blob_sha(xml_string)
+    terms = load_cached_terms(cache_dir, blob_sha)
+    outcome = "parse_cache_misses" if terms is None else "parse_cache_hits"
+    if counts is not None:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    if terms is not None:
+        return terms
+    cache_path = os.path.join(cache_dir, "parsed", f"{blob_sha}.json")
+    terms = parse(xml_string)
+    if terms:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        entries = [[name, form, value] for (name, form), value in terms.items()]
+        _write_atomic(cache_path, json.dumps(entries, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    return terms
+
+def prune_parse_cache(cache_dir: str, max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+    """Evict the least recently used parsed locales beyond max_entries."""
+    paths = glob.glob(os.path.join(cache_dir, "parsed", "*.json"))
+    if len(paths) <= max_entries:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - max_entries]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _normalize_value(value) -> str:
+    if isinstance(value, tuple):
+        return f"{value[0]}|{value[1]}"
+    return str(value)
+
+def build_reference_index(english_terms: Dict) -> List[Tuple[Tuple[str, str], str | Tuple[str, str], str]]:
+    """Precompute (key, English value, normalized value) once, in en-US term order."""
+    return [(key, value, _normalize_value(value)) for key, value in english_terms.items()]
+
+def find_untranslated_terms(reference: List, current_terms: Dict) -> List[Dict]:
+    """Return the en-US terms whose value in current_terms is identical to the English one."""
+    untranslated_terms = []
+    get = current_terms.get
+    for term_key, english_value, english_norm in reference:
+        current_value = get(term_key)
+        # Values of the same type compare directly; only a str/tuple mix needs the joined form
+        if current_value == english_value or (
+                type(current_value) is not type(english_value) and _normalize_value(current_value) == english_norm):
+            untranslated_terms.append({"key": term_key, "value": english_value})
+    return untranslated_terms
+
+def build_result(lang_code: str, untranslated_terms: List[Dict], total_terms: int) -> Dict:
+    """Summarize one locale's comparison the way the pages, exports and stats store expect it."""
+    untranslated_count = len(untranslated_terms)
+    translated_count = total_terms - untranslated_count
+    return {
+        "language": get_language_name(lang_code),
+        "lang_code": lang_code,
+        "translated_count": translated_count,
+        "untranslated_count": untranslated_count,
+        "percentage": (translated_count / total_terms) * 100 if total_terms else 0,
+        "untranslated_terms": untranslated_terms
+    }
+
+def _init_analysis_worker(reference: List, parser_name: str, cache_dir: str | None):
+    _worker_state.update(reference=reference, parse=PARSERS[parser_name], cache_dir=cache_dir)
+
+@contextmanager
+def _thread_stage(stage: str):
+    """Mark the current thread as working on a stage until the block exits."""
+    thread_id = threading.get_ident()
+    previous = _thread_stages.get(thread_id)
+    _thread_stages[thread_id] = stage
+    try:
+        yield
+    finally:
+        if previous is None:
+            _thread_stages.pop(thread_id, None)
+        else:
+            _thread_stages[thread_id] = previous
+
+def _compare_in_worker(terms: Dict) -> Tuple[List[Tuple[str, str]], Dict[str, Tuple[float, float]]]:
+    """Compare one parsed locale; returns the untranslated keys and (wall, CPU) seconds for the stage."""
+    wall, cpu = time.perf_counter(), time.thread_time()
+    # Only the keys travel back; the parent already has the English values
+    with _thread_stage("compare"):
+        keys = [term["key"] for term in find_untranslated_terms(_worker_state["reference"], terms)]
+    return keys, {"compare": (time.perf_counter() - wall, time.thread_time() - cpu)}
+
+def _analyze_in_worker(xml_string: str) -> Tuple[List[Tuple[str, str]], Dict[str, Tuple[float, float]], Dict]:
+    """Parse and compare one locale.
+
+    Returns the untranslated keys, (wall, CPU) seconds per stage and the parse cache counts.
+    """
+    wall, cpu = time.perf_counter(), time.thread_time()
+    counts = {}
+    with _thread_stage("parse"):
+        terms = load_locale_terms(xml_string, _worker_state["parse"], _worker_state["cache_dir"], counts)
+    timings = {"parse": (time.perf_counter() - wall, time.thread_time() - cpu)}
+    keys, compare_timings = _compare_in_worker(terms)
+    return keys, timings | compare_timings, counts
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _digest(data) -> str:
+    return _sha256(json.dumps(data, sort_keys=True, ensure_ascii=False))
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict:
+    """Read the per-page hashes and blob SHAs recorded by the last run."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault("locales", {})
+    manifest.setdefault("index", None)
+    return manifest
+
+def save_manifest(manifest: Dict, path: str = MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+def _page_input(lang_name: str, total_terms: int, untranslated_terms: List[str]) -> str:
+    return _digest([PAGE_TEMPLATE_VERSION, lang_name, total_terms, untranslated_terms])
+
+def page_is_current(entry: Dict | None, input_hash: str, path: str) -> bool:
+    """True if the page was rendered from the same input and is still on disk as written."""
+    if not entry or entry.get("input") != input_hash:
+        return False
+    try:
+        with open(path, encoding="utf-8") as f:
+            return _sha256(f.read()) == entry.get("output")
+    except OSError:
+        return False
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Write content to path unless the file already holds exactly that; returns True if written."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return True
+
+def _export_term(term: Dict) -> Dict:
+    name, form = term["key"]
+    value = term["value"]
+    if isinstance(value, tuple):
+        value = {"single": value[0], "multiple": value[1]}
+    return {"name": name, "form": form, "value": value}
+
+def export_results(results: List[Dict], total_terms: int, summary_path: str = SUMMARY_JSON_PATH,
+                   terms_path: str = TERMS_NDJSON_PATH) -> int:
+    """Write the results as one compact JSON summary and one NDJSON record per untranslated term.
+
+    Returns the number of files that changed.
+    """
+    separators = (",", ":")
+    summary = {"total_terms": total_terms, "locales": [
+        {key: res[key] for key in ("lang_code", "language", "translated_count", "untranslated_count", "percentage")}
+        | {"untranslated_terms": [_export_term(term) for term in res["untranslated_terms"]]}
+        for res in results]}
+    lines = [json.dumps({"lang_code": res["lang_code"]} | _export_term(term), ensure_ascii=False,
+                        separators=separators) + "\n"
+             for res in results for term in res["untranslated_terms"]]
+    changed = write_if_changed(summary_path, json.dumps(summary, ensure_ascii=False, separators=separators))
+    changed += write_if_changed(terms_path, "".join(lines))
+    return changed
+
+def _compressed_copy_matches(path: str, decompress: Callable[[bytes], bytes], errors: Tuple, data: bytes) -> bool:
+    """True if the compressed copy at path exists and inflates to data; damaged copies count as stale."""
+    try:
+        with open(path, "rb") as f:
+            return decompress(f.read()) == data
+    except errors:
+        return False
+
+def precompress_file(path: str) -> bool:
+    """Write deterministic .gz (and .br, if brotli is installed) copies of a file next to it.
+
+    Copies that already decompress to the file's content are left alone; returns True if anything was written.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    changed = False
+    if not _compressed_copy_matches(f"{path}.gz", gzip.decompress, (OSError, EOFError, zlib.error), data):
+        _write_atomic(f"{path}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+        changed = True
+    if brotli is not None and not _compressed_copy_matches(f"{path}.br", brotli.decompress,
+                                                           (OSError, brotli.error), data):
+        _write_atomic(f"{path}.br", brotli.compress(data))
+        changed = True
+    return changed
+
+# Client-side rendered site for --site app: index and per-locale views are built in the
+# browser from docs/data/summary.json (preferring the pre-gzipped copy when it can be inflated)
+APP_SHELL = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>CSL Locale Translation Status</title>
+<style>
+body { font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }
+h1, p { text-align: center; }
+table { max-width: 800px; width: 100%; border-collapse: collapse; margin: 20px auto; }
+th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+th { background-color: #2d98e0; color: white; }
+tr:nth-child(even) { background-color: #f9f9f9; }
+tr:hover { background-color: #f5f5f5; }
+.updated { font-size: 0.9em; color: #888; text-align: center; }
+</style>
+</head>
+<body>
+<h1 id="title">CSL Locale Translation Status</h1>
+<div id="intro"></div>
+<table><thead id="head"></thead><tbody id="rows"></tbody></table>
+<p class="updated">Data fetched from <a href="https://github.com/citation-style-language/locales">CSL locales repo</a>.</p>
+<script>
+async function loadData() {
+  if ("DecompressionStream" in window) {
+    try {
+      const response = await fetch("data/summary.json.gz");
+      if (response.ok) {
+        return await new Response(response.body.pipeThrough(new DecompressionStream("gzip"))).json();
+      }
+    } catch (e) {}
+  }
+  return (await fetch("data/summary.json")).json();
+}
+function row(tag, cells) {
+  const tr = document.createElement("tr");
+  for (const cell of cells) {
+    const td = document.createElement(tag);
+    td.append(cell);
+    tr.append(td);
+  }
+  return tr;
+}
+function link(href, text) {
+  const a = document.createElement("a");
+  a.href = href;
+  a.textContent = text;
+  return a;
+}
+function paragraph(...content) {
+  const p = document.createElement("p");
+  p.append(...content);
+  return p;
+}
+function render(data) {
+  const intro = document.getElementById("intro");
+  const head = document.getElementById("head");
+  const rows = document.getElementById("rows");
+  const code = decodeURIComponent(location.hash.slice(1));
+  const locale = data.locales.find(l => l.lang_code === code);
+  if (locale) {
+    const name = `${locale.language} (${locale.lang_code})`;
+    document.title = `Untranslated Terms - ${name}`;
+    document.getElementById("title").textContent = `Untranslated Terms for ${name}`;
+    intro.replaceChildren(
+      paragraph(`Showing ${locale.untranslated_count} untranslated terms out of ${data.total_terms} total terms.`),
+      paragraph(link("#", "Back to Translation Status")));
+    head.replaceChildren(row("th", ["Term Name", "Form", "English Text"]));
+    rows.replaceChildren(...locale.untranslated_terms.map(term => row("td", [
+      term.name, term.form || "-",
+      typeof term.value === "string" ? term.value : `Single: ${term.value.single} / Multiple: ${term.value.multiple}`])));
+  } else {
+    document.title = "CSL Locale Translation Status";
+    document.getElementById("title").textContent = "CSL Locale Translation Status";
+    const total = paragraph(`Total locales analyzed: ${data.locales.length}`);
+    total.className = "updated";
+    intro.replaceChildren(
+      paragraph("Generated dynamically from the official ",
+                link("https://github.com/citation-style-language/locales", "CSL locales repository"), "."),
+      paragraph("Want to help? Head over to ", link("https://github.com/citation-style-language/locales", "GitHub"),
+                " and submit a PR with new translations for your native language."),
+      total);
+    head.replaceChildren(row("th", ["Language", "Translated Terms", "Untranslated Terms", "Translation %"]));
+    rows.replaceChildren(...data.locales.map(l => row("td", [
+      link(`#${encodeURIComponent(l.lang_code)}`, `${l.language} (${l.lang_code})`),
+      l.translated_count, l.untranslated_count, `${l.percentage.toFixed(1)}%`])));
+  }
+}
+loadData().then(data => {
+  render(data);
+  window.addEventListener("hashchange", () => { render(data); window.scrollTo(0, 0); });
+});
+</script>
+</body></html>
+"""
+
+def remove_locale_pages(manifest: Dict, directory: str = "docs/locales") -> int:
+    """Delete the static per-locale pages (and their compressed copies) and forget their hashes.
+
+    Used by --site app, whose single page replaces them; returns the number of pages removed.
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(directory, "locale_*.html*")):
+        os.remove(path)
+        removed += path.endswith(".html")
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass  # missing, or holds files this script did not write
+    for entry in manifest["locales"].values():
+        entry.pop("input", None)
+        entry.pop("output", None)
+    manifest["index"] = None
+    return removed
+
+def load_previous_results(summary_path: str = SUMMARY_JSON_PATH) -> Tuple[int, Dict[str, Dict]]:
+    """Read back the results exported by the last run as (total_terms, {lang_code: result})."""
+    try:
+        with open(summary_path, encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return 0, {}
+    previous = {}
+    for locale in summary.get("locales", []):
+        untranslated_terms = []
+        for term in locale["untranslated_terms"]:
+            value = term["value"]
+            if isinstance(value, dict):
+                value = (value["single"], value["multiple"])
+            untranslated_terms.append({"key": (term["name"], term["form"]), "value": value})
+        previous[locale["lang_code"]] = build_result(locale["lang_code"], untranslated_terms, summary["total_terms"])
+    return summary.get("total_terms", 0), previous
+
+def render_locale_page(lang_code: str, lang_name: str, untranslated_terms: List[Dict], total_terms: int) -> str:
+    """Return the HTML of a per-locale page."""
     last_updated = datetime.now().strftime("%B %d, %Y")
-    html_content = f"""<!DOCTYPE html>
+    # Rows are collected and joined once so large pages render in linear time
+    parts = [f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
@@ -114,7 +926,7 @@ tr:hover {{ background-color: #f5f5f5; }}
 <table>
 <thead><tr><th>Term Name</th><th>Form</th><th>English Text</th></tr></thead>
 <tbody>
-"""
+"""]
     for term in untranslated_terms:
         name, form = term['key']
         value = term['value']
@@ -122,60 +934,27 @@ tr:hover {{ background-color: #f5f5f5; }}
             value_text = f"Single: {value[0]}<br>Multiple: {value[1]}"
         else:
             value_text = value
-        html_content += f"<tr><td>{name}</td><td>{form or '-'}</td><td>{value_text}</td></tr>\n"
-    html_content += """</tbody></table>
+        parts.append(f"<tr><td>{name}</td><td>{form or '-'}</td><td>{value_text}</td></tr>\n")
+    parts.append("""</tbody></table>
 <p class="updated">Data fetched from <a href="https://github.com/citation-style-language/locales">CSL locales repo</a>.</p>
-</body></html>"""
-    with open(f"docs/locales/locale_{lang_code}.html", "w", encoding="utf-8") as f:
+</body></html>""")
+    return "".join(parts)
+
+def write_page(path: str, html_content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
         f.write(html_content)
 
-def main():
-    locale_codes = fetch_locale_codes()
-    if not locale_codes or "en-US" not in locale_codes:
-        print("No locales or en-US missing. Exiting.")
-        return
-    english_xml = fetch_xml_content("en-US")
-    english_terms = parse_locale_terms(english_xml)
-    total_terms = len(english_terms)
-    results = []
-    for lang_code in locale_codes:
-        if lang_code == "en-US":
-            continue
-        lang_name = get_language_name(lang_code)
-        current_xml = fetch_xml_content(lang_code)
-        if not current_xml:
-            continue
-        current_terms = parse_locale_terms(current_xml)
-        untranslated_terms = []
-        untranslated_count = 0
-        for term_key, english_value in english_terms.items():
-            current_value = current_terms.get(term_key)
-            if isinstance(english_value, tuple):
-                eng_str = f"{english_value[0]}|{english_value[1]}"
-            else:
-                eng_str = str(english_value)
-            if isinstance(current_value, tuple):
-                curr_str = f"{current_value[0]}|{current_value[1]}"
-            else:
-                curr_str = str(current_value)
-            if curr_str == eng_str:
-                untranslated_terms.append({"key": term_key, "value": english_value})
-                untranslated_count += 1
-        translated_count = total_terms - untranslated_count
-        percentage = (translated_count / total_terms) * 100 if total_terms else 0
-        results.append({
-            "language": lang_name,
-            "lang_code": lang_code,
-            "translated_count": translated_count,
-            "untranslated_count": untranslated_count,
-            "percentage": percentage,
-            "untranslated_terms": untranslated_terms
-        })
-        generate_locale_page(lang_code, lang_name, untranslated_terms, total_terms)
-    results.sort(key=lambda x: x["percentage"], reverse=True)
+def generate_locale_page(lang_code: str, lang_name: str, untranslated_terms: List[Dict], total_terms: int) -> str:
+    """Generate per-locale HTML page and return its content."""
+    html_content = render_locale_page(lang_code, lang_name, untranslated_terms, total_terms)
+    write_page(f"docs/locales/locale_{lang_code}.html", html_content)
+    return html_content
+
+def render_index_page(results: List[Dict]) -> str:
+    """Return the HTML of the translation status overview page."""
     last_updated = datetime.now().strftime("%B %d, %Y")
-    os.makedirs("docs", exist_ok=True)
-    html_content = f"""<!DOCTYPE html>
+    parts = [f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
@@ -199,15 +978,767 @@ tr:hover {{ background-color: #f5f5f5; }}
 <table>
 <thead><tr><th>Language</th><th>Translated Terms</th><th>Untranslated Terms</th><th>Translation %</th></tr></thead>
 <tbody>
-"""
+"""]
     for res in results:
-        html_content += f"<tr><td><a href='locales/locale_{res['lang_code']}.html'>{res['language']} ({res['lang_code']})</a></td><td>{res['translated_count']}</td><td>{res['untranslated_count']}</td><td>{res['percentage']:.1f}%</td></tr>\n"
-    html_content += """</tbody></table>
+        parts.append(f"<tr><td><a href='locales/locale_{res['lang_code']}.html'>{res['language']} ({res['lang_code']})</a></td><td>{res['translated_count']}</td><td>{res['untranslated_count']}</td><td>{res['percentage']:.1f}%</td></tr>\n")
+    parts.append("""</tbody></table>
 <p class="updated">Run the script to refresh data.</p>
-</body></html>"""
-    with open("docs/index.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
-    print(f"HTML file 'docs/index.html' generated with {len(results)} locales.")
+</body></html>""")
+    return "".join(parts)
+
+def generate_index_page(results: List[Dict]) -> str:
+    """Generate the translation status overview page and return its content."""
+    html_content = render_index_page(results)
+    write_page("docs/index.html", html_content)
+    return html_content
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    total_terms INTEGER NOT NULL,
+    UNIQUE (run_at, source)
+);
+CREATE TABLE IF NOT EXISTS locale_stats (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    lang_code TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    translated_count INTEGER NOT NULL,
+    untranslated_count INTEGER NOT NULL,
+    percentage REAL NOT NULL,
+    PRIMARY KEY (run_id, lang_code)
+);
+CREATE INDEX IF NOT EXISTS locale_stats_trend ON locale_stats (lang_code, run_at, percentage);
+CREATE INDEX IF NOT EXISTS locale_stats_time ON locale_stats (run_at);
+CREATE TABLE IF NOT EXISTS untranslated_terms (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    lang_code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    form TEXT NOT NULL,
+    PRIMARY KEY (run_id, lang_code, name, form)
+);
+CREATE INDEX IF NOT EXISTS untranslated_terms_term ON untranslated_terms (lang_code, name, form);
+"""
+
+def open_stats_db(path: str) -> sqlite3.Connection:
+    """Open (and create if needed) the SQLite store of per-run locale statistics."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(STATS_SCHEMA)
+    return conn
+
+def record_run(conn: sqlite3.Connection, results: List[Dict], total_terms: int,
+               run_at: str | None = None, source: str = "") -> int | None:
+    """Append one row per locale and one per untranslated term; returns None if the run was already stored."""
+    run_at = run_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with conn:
+        cursor = conn.execute("INSERT OR IGNORE INTO runs (run_at, source, total_terms) VALUES (?, ?, ?)",
+                              (run_at, source, total_terms))
+        if not cursor.rowcount:
+            return None
+        run_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO locale_stats VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, res["lang_code"], run_at, res["translated_count"], res["untranslated_count"], res["percentage"])
+             for res in results])
+        conn.executemany(
+            "INSERT OR IGNORE INTO untranslated_terms VALUES (?, ?, ?, ?)",
+            [(run_id, res["lang_code"], *term["key"]) for res in results for term in res["untranslated_terms"]])
+    return run_id
+
+def find_regressions(conn: sqlite3.Connection, since: str) -> List[Tuple[str, float, float]]:
+    """Return (lang_code, first %, latest %) for locales whose percentage dropped since the given ISO date."""
+    rows = conn.execute("""
+        SELECT lang_code,
+               (SELECT percentage FROM locale_stats AS first WHERE first.lang_code = codes.lang_code
+                AND first.run_at >= :since ORDER BY run_at LIMIT 1),
+               (SELECT percentage FROM locale_stats AS last WHERE last.lang_code = codes.lang_code
+                AND last.run_at >= :since ORDER BY run_at DESC LIMIT 1)
+        FROM (SELECT DISTINCT lang_code FROM locale_stats WHERE run_at >= :since) AS codes
+    """, {"since": since}).fetchall()
+    return sorted((row for row in rows if row[2] < row[1]), key=lambda row: row[2] - row[1])
+
+class GitObjectReader:
+    """Read objects from a local repository through one long-lived `git cat-file --batch` process."""
+
+    def __init__(self, repo_path: str):
+        self._process = subprocess.Popen(["git", "-C", repo_path, "cat-file", "--batch"],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, spec: str) -> Tuple[str, str, bytes] | None:
+        """Return (sha, type, data) for an object name such as a blob SHA or '<commit>^{tree}'."""
+        self._process.stdin.write(spec.encode("utf-8") + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().decode("utf-8").split()
+        if len(header) != 3:
+            return None  # "<spec> missing"
+        sha, object_type, size = header
+        data = self._process.stdout.read(int(size))
+        self._process.stdout.read(1)  # trailing newline
+        return sha, object_type, data
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+        self._process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_tree_locales(tree_data: bytes) -> Dict[str, str]:
+    """Map lang_code -> blob SHA for the locales-*.xml entries of a raw git tree object."""
+    blobs = {}
+    pos = 0
+    while pos < len(tree_data):
+        space = tree_data.index(b" ", pos)
+        nul = tree_data.index(b"\0", space)
+        mode, name = tree_data[pos:space], tree_data[space + 1:nul].decode("utf-8", errors="replace")
+        sha = tree_data[nul + 1:nul + 21].hex()
+        pos = nul + 21
+        match = LOCALE_FILE_PATTERN.match(name)
+        if match and not mode.startswith(b"4"):  # skip subtrees
+            blobs[match.group(1)] = sha
+    return blobs
+
+def list_history_commits(repo_path: str, ref: str = "master", weekly: bool = False) -> List[Tuple[str, int]]:
+    """List (commit SHA, commit timestamp) oldest first, optionally only the last commit of each ISO week."""
+    log = subprocess.run(["git", "-C", repo_path, "log", "--first-parent", "--reverse", "--format=%H %ct", ref],
+                         check=True, capture_output=True, text=True).stdout
+    commits = [(sha, int(timestamp)) for sha, timestamp in (line.split() for line in log.splitlines())]
+    if not weekly:
+        return commits
+    last_of_week = {}
+    for sha, timestamp in commits:
+        last_of_week[datetime.fromtimestamp(timestamp, timezone.utc).isocalendar()[:2]] = (sha, timestamp)
+    return sorted(last_of_week.values(), key=lambda commit: commit[1])
+
+def backfill_history(repo_path: str, ref: str = "master", weekly: bool = False, parser_name: str = "dom",
+                     cache_dir: str | None = None, output_path: str = BACKFILL_OUTPUT,
+                     stats_db: sqlite3.Connection | None = None) -> int:
+    """Compute translation status for each commit of a locales clone without checking anything out.
+
+    Writes one NDJSON record per locale per commit (and a run per commit to stats_db, if given)
+    and returns the number of commits processed. Results are reused for every (en-US blob,
+    locale blob) pair already seen, so only locales touched by a commit are read and compared again.
+    """
+    parse = PARSERS[parser_name]
+    commits = list_history_commits(repo_path, ref, weekly)
+    references = {}
+    stats = {}
+    processed = 0
+
+    def read_blob_terms(blob_sha: str) -> Dict:
+        terms = load_cached_terms(cache_dir, blob_sha) if cache_dir else None
+        if terms is None:
+            terms = load_locale_terms(reader.read(blob_sha)[2].decode("utf-8"), parse, cache_dir)
+        return terms
+
+    with GitObjectReader(repo_path) as reader, open(output_path, "w", encoding="utf-8") as out:
+        for commit_sha, timestamp in commits:
+            tree = reader.read(f"{commit_sha}^{{tree}}")
+            blobs = read_tree_locales(tree[2]) if tree else {}
+            english_sha = blobs.get("en-US")
+            if not english_sha:
+                continue
+            if english_sha not in references:
+                english_terms = read_blob_terms(english_sha)
+                references = {english_sha: (build_reference_index(english_terms), len(english_terms))}
+                stats.clear()  # comparisons against an older en-US are never needed again
+            reference, total_terms = references[english_sha]
+            date = datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+            results = []
+            for lang_code, blob_sha in sorted(blobs.items()):
+                if lang_code == "en-US":
+                    continue
+                if blob_sha not in stats:
+                    current_terms = read_blob_terms(blob_sha)
+                    stats[blob_sha] = find_untranslated_terms(reference, current_terms)
+                result = build_result(lang_code, stats[blob_sha], total_terms)
+                results.append(result)
+                out.write(json.dumps({
+                    "commit": commit_sha,
+                    "date": date,
+                    "lang_code": lang_code,
+                    "translated_count": result["translated_count"],
+                    "untranslated_count": result["untranslated_count"],
+                    "percentage": result["percentage"],
+                }) + "\n")
+            if stats_db is not None:
+                record_run(stats_db, results, total_terms, run_at=date, source=commit_sha)
+            processed += 1
+    return processed
+
+class RunMetrics:
+    """Wall time, CPU time, bytes and item counts per stage of a run, and per locale.
+
+    A stage measured on several threads (or worker processes) at once is summed over all
+    of them, so its wall time is the time spent in it and can exceed the run's duration.
+    """
+
+    def __init__(self):
+        self.started = datetime.now(timezone.utc)
+        self.stages: Dict[str, Dict] = {}
+        self.locales: Dict[str, Dict] = {}
+        self.counters: Dict[str, int] = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, wall: float, cpu: float, items: int = 1, nbytes: int = 0, lang_code: str | None = None):
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "bytes": 0, "items": 0})
+            totals["wall_seconds"] += wall
+            totals["cpu_seconds"] += cpu
+            totals["bytes"] += nbytes
+            totals["items"] += items
+            if lang_code:
+                self.locales.setdefault(lang_code, {})[stage] = {
+                    "wall_seconds": round(wall, 6), "cpu_seconds": round(cpu, 6), "bytes": nbytes}
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, stage: str, items: int = 1, lang_code: str | None = None):
+        """Time the enclosed block on the current thread; set "bytes" or "items" on the yielded dict."""
+        measure = {"items": items, "bytes": 0}
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            with _thread_stage(stage):
+                yield measure
+        finally:
+            self.add(stage, time.perf_counter() - wall, time.thread_time() - cpu, measure["items"],
+                     measure["bytes"], lang_code)
+
+    def report(self, **extra) -> Dict:
+        with self._lock:
+            stages = {stage: {key: round(value, 6) if isinstance(value, float) else value
+                              for key, value in totals.items()} for stage, totals in self.stages.items()}
+            locales = {lang_code: dict(stages_of) for lang_code, stages_of in sorted(self.locales.items())}
+            counters = dict(self.counters)
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": round(time.perf_counter() - self._wall, 6),
+            "cpu_seconds": round(time.process_time() - self._cpu, 6),
+            "stages": stages,
+            "locales": locales,
+            "counters": counters,
+        } | extra
+
+def write_run_report(metrics: RunMetrics, path: str = RUN_REPORT_PATH, **extra):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics.report(**extra), f, indent=1)
+        f.write("\n")
+
+class StackSampler:
+    """Wall-clock sampling profiler for the threads that are inside a stage (see _thread_stage).
+
+    Every `interval` seconds the stack of each such thread is recorded under its stage, so
+    threads waiting on the network count towards "fetch" just like busy ones count towards "parse".
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples: Dict[str, Dict[Tuple[str, ...], int]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                stage = _thread_stages.get(thread_id)
+                if stage is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = getattr(code, "co_qualname", code.co_name)
+                    stack.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack = tuple(reversed(stack))
+                stage_samples = self.samples.setdefault(stage, {})
+                stage_samples[stack] = stage_samples.get(stack, 0) + 1
+
+    def write(self, directory: str, top: int = 40) -> List[str]:
+        """Write profile-<stage>.txt per stage and one stacks.folded for flame graph tools; returns the paths."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        folded = []
+        for stage, stacks in sorted(self.samples.items()):
+            total = sum(stacks.values())
+            own, inclusive = {}, {}
+            for stack, n in stacks.items():
+                own[stack[-1]] = own.get(stack[-1], 0) + n
+                for frame in set(stack):
+                    inclusive[frame] = inclusive.get(frame, 0) + n
+                folded.append(f"{stage};{';'.join(stack)} {n}")
+            lines = [f"Stage {stage}: {total} samples every {self.interval * 1000:g} ms "
+                     f"(about {total * self.interval:.2f}s across threads)", ""]
+            for title, counts in (("Own samples (the function itself was running)", own),
+                                  ("Total samples (the function was on the stack)", inclusive)):
+                lines += [title, f"{'samples':>8} {'share':>7}  function"]
+                for frame, n in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]:
+                    lines.append(f"{n:>8} {n / total:>7.1%}  {frame}")
+                lines.append("")
+            path = os.path.join(directory, f"profile-{stage}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            paths.append(path)
+        path = os.path.join(directory, "stacks.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in sorted(folded)))
+        paths.append(path)
+        return paths
+
+# Prefix of the metric names written by --prometheus-file
+PROMETHEUS_PREFIX = "csl_translation_status"
+
+def _prometheus_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+def format_prometheus(report: Dict, results: List[Dict], total_terms: int) -> str:
+    """Render a run report and the per-locale results in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]):
+        name = f"{PROMETHEUS_PREFIX}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_prometheus_labels(labels)} {value}")
+
+    stages = report["stages"]
+    http = report.get("http", {})
+    counters = report.get("counters", {})
+    counts = report.get("counts", {})
+    metric("run_duration_seconds", "gauge", "Wall time of the last run.", [({}, report["wall_seconds"])])
+    metric("run_timestamp_seconds", "gauge", "Unix time the last run finished.", [({}, round(time.time()))])
+    metric("stage_duration_seconds", "gauge", "Wall time spent in each stage, summed over threads.",
+           [({"stage": stage}, totals["wall_seconds"]) for stage, totals in stages.items()])
+    metric("stage_cpu_seconds", "gauge", "CPU time spent in each stage.",
+           [({"stage": stage}, totals["cpu_seconds"]) for stage, totals in stages.items()])
+    metric("stage_items", "gauge", "Items (locales, pages, files) handled by each stage.",
+           [({"stage": stage}, totals["items"]) for stage, totals in stages.items()])
+    metric("stage_bytes", "gauge", "Bytes read or written by each stage.",
+           [({"stage": stage}, totals["bytes"]) for stage, totals in stages.items()])
+    metric("http_requests", "gauge", "HTTP requests sent, including retries.", [({}, http.get("requests", 0))])
+    metric("http_retries", "gauge", "HTTP requests that were retried.", [({}, http.get("retries", 0))])
+    metric("http_failures", "gauge", "HTTP requests that failed for good.", [({}, http.get("failures", 0))])
+    metric("http_responses", "gauge", "HTTP responses by status code.",
+           [({"code": str(code)}, n) for code, n in http.get("statuses", {}).items()])
+    metric("http_bytes_received", "gauge", "HTTP response body bytes read off the wire, before gzip decoding.",
+           [({}, http.get("bytes_received", 0))])
+    metric("http_throttled_seconds", "gauge", "Wall time during which requests waited for the rate limit.",
+           [({}, http.get("throttled_seconds", 0))])
+    buckets = []
+    cumulative = 0
+    for bound, n in http.get("latency_buckets", {}).items():
+        cumulative += n
+        buckets.append(({"le": str(bound)}, cumulative))
+    responses = sum(http.get("statuses", {}).values())
+    buckets.append(({"le": "+Inf"}, responses))
+    metric("http_request_duration_seconds", "histogram", "Time until the response headers arrived.", [])
+    name = f"{PROMETHEUS_PREFIX}_http_request_duration_seconds"
+    lines.extend(f"{name}_bucket{_prometheus_labels(labels)} {value}" for labels, value in buckets)
+    lines.extend([f"{name}_sum {http.get('latency_seconds', 0)}", f"{name}_count {responses}"])
+    parse_lookups = counters.get("parse_cache_hits", 0) + counters.get("parse_cache_misses", 0)
+    other_locales = max(counts.get("locales", 1) - 1, 1)
+    metric("cache_hit_ratio", "gauge", "Share of lookups answered from a cache: HTTP revalidations answered "
+           "with 304, parsed locales and whole results reused by blob SHA.", [
+               ({"cache": "http"}, round(http.get("statuses", {}).get(304, 0) / responses, 6) if responses else 0),
+               ({"cache": "parsed"}, round(counters.get("parse_cache_hits", 0) / parse_lookups, 6)
+                if parse_lookups else 0),
+               ({"cache": "results"}, round(counts.get("reused", 0) / other_locales, 6))])
+    metric("total_terms", "gauge", "Terms in the en-US locale.", [({}, total_terms)])
+    metric("locales", "gauge", "Locales on the index page.", [({}, len(results))])
+    for key, help_text in (("translated_count", "Terms translated in the locale."),
+                           ("untranslated_count", "Terms still identical to en-US in the locale."),
+                           ("percentage", "Share of the en-US terms translated in the locale, in percent.")):
+        metric(f"locale_{key}", "gauge", help_text,
+               [({"lang_code": res["lang_code"], "language": res["language"]}, round(res[key], 6))
+                for res in results])
+    return "\n".join(lines) + "\n"
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the CSL locale translation status pages.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"number of locale files fetched in parallel (default: {MAX_WORKERS})")
+    parser.add_argument("--pool-size", type=int,
+                        help="maximum pooled HTTP connections (default: same as --workers)")
+    parser.add_argument("--connect-timeout", type=float, default=HTTP_TIMEOUT[0],
+                        help=f"HTTP connect timeout in seconds (default: {HTTP_TIMEOUT[0]})")
+    parser.add_argument("--read-timeout", type=float, default=HTTP_TIMEOUT[1],
+                        help=f"HTTP read timeout in seconds (default: {HTTP_TIMEOUT[1]})")
+    parser.add_argument("--rate", type=float, default=REQUEST_RATE,
+                        help=f"sustained HTTP requests per second (default: {REQUEST_RATE})")
+    parser.add_argument("--burst", type=int, default=REQUEST_BURST,
+                        help=f"HTTP requests allowed in a burst above --rate (default: {REQUEST_BURST})")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help=f"retries for failed or rate-limited HTTP requests (default: {MAX_RETRIES})")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"directory for the persistent HTTP cache (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="disable the persistent HTTP and parsed-locale caches")
+    parser.add_argument("--parse-cache-size", type=int, default=PARSE_CACHE_MAX_ENTRIES,
+                        help=f"maximum number of parsed locales kept in the cache (default: {PARSE_CACHE_MAX_ENTRIES})")
+    parser.add_argument("--discovery", choices=["trees", "contents"], default="trees",
+                        help="GitHub API used to list locales: one git-trees request returning blob SHAs "
+                             "('trees', default, falls back to 'contents') or the contents listing")
+    parser.add_argument("--locales-dir",
+                        help="read locales-*.xml from a local directory (e.g. a clone of the locales repo) "
+                             "instead of downloading them")
+    parser.add_argument("--parser", choices=sorted(PARSERS), default="dom",
+                        help="locale parser: full DOM ('dom', default) or incremental pull parser ('stream')")
+    parser.add_argument("--archive", nargs="?", const=ARCHIVE_URL,
+                        help="read all locales from one tar.gz/zip archive of the locales repo, given as a "
+                             "path or URL (default URL: the master branch tarball)")
+    parser.add_argument("--site", choices=["static", "app"], default="static",
+                        help="'static' (default) writes one HTML page per locale; 'app' writes a single page "
+                             "that renders every view in the browser from docs/data/summary.json")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br, with the brotli package) copies of every output file")
+    parser.add_argument("--db", metavar="PATH",
+                        help="append per-locale statistics of this run to a SQLite database")
+    parser.add_argument("--regressions", type=int, metavar="DAYS",
+                        help="list locales from --db whose percentage dropped in the last DAYS days, then exit")
+    parser.add_argument("--backfill", metavar="REPO",
+                        help="compute the status for the history of a local clone of the locales repo "
+                             "instead of generating the pages")
+    parser.add_argument("--backfill-ref", default="master", help="branch or commit to walk (default: master)")
+    parser.add_argument("--backfill-weekly", action="store_true",
+                        help="only use the last commit of each week instead of every commit")
+    parser.add_argument("--backfill-output", default=BACKFILL_OUTPUT,
+                        help=f"NDJSON file written by --backfill (default: {BACKFILL_OUTPUT})")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="parse and compare locales in this many worker processes (default: 0, in-process)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="sample the stacks of every stage while running and write a profile per stage "
+                             "and a collapsed-stack file for flame graphs to DIR (analysis runs in-process)")
+    parser.add_argument("--prometheus-file", metavar="PATH",
+                        help="also write the run's metrics and per-locale gauges to a .prom file for "
+                             "node_exporter's textfile collector")
+    parser.add_argument("--endpoint", metavar="URL",
+                        help="send every HTTP request to this scheme://host[:port] instead of GitHub, keeping "
+                             "the path (e.g. csl-translation-status-replay-server.py)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save every HTTP response (status, headers, body) to a gzipped JSON snapshot for "
+                             "the replay server; implies a full run without caches or reused results")
+    parser.add_argument("--report", default=RUN_REPORT_PATH, metavar="PATH",
+                        help=f"JSON file for the per-stage timings of the run, with HTTP bytes counted as read "
+                             f"off the wire before gzip decoding (default: {RUN_REPORT_PATH}; '' to skip it)")
+    args = parser.parse_args(argv)
+    if args.rate <= 0:
+        parser.error("--rate must be greater than 0")
+    if args.burst < 1:
+        parser.error("--burst must be at least 1")
+    if args.retries < 0:
+        parser.error("--retries must not be negative")
+    return args
+
+async def run_pipeline(lang_codes: List[str], fetch: Callable[[str], str | None], reference: List,
+                       on_result: Callable[[str, List[Dict] | None], None],
+                       parsed: Iterable[Tuple[str, Dict]] = (), parser_name: str = "dom",
+                       cache_dir: str | None = None, workers: int = MAX_WORKERS, processes: int = 0,
+                       queue_size: int = PIPELINE_QUEUE_SIZE, metrics: RunMetrics | None = None):
+    """Fetch, parse, compare and hand over every locale with all stages running at the same time.
+
+    Downloads run on `workers` threads, parsing and comparison on one thread (or `processes`
+    worker processes) and on_result on a thread of its own. Bounded queues connect the stages,
+    so a slow stage holds the others back instead of piling up locales in memory.
+    on_result(lang_code, untranslated_terms) is called once per locale, in completion order,
+    with None for locales that could not be loaded. `parsed` holds (lang_code, terms) pairs
+    that skip the download and parse stages. Parse and compare times are added to `metrics`.
+    """
+    loop = asyncio.get_running_loop()
+    metrics = metrics or RunMetrics()
+    english_values = {term_key: english_value for term_key, english_value, _ in reference}
+    fetched = asyncio.Queue(queue_size)
+    analyzed = asyncio.Queue(queue_size)
+    pending = iter(lang_codes)
+    analyzers = max(1, processes)
+    initargs = (reference, parser_name, cache_dir)
+    if processes > 0:
+        analyze_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=_init_analysis_worker, initargs=initargs)
+    else:
+        analyze_pool = ThreadPoolExecutor(max_workers=1, initializer=_init_analysis_worker, initargs=initargs)
+
+    def untranslated_with_values(lang_code: str, untranslated_keys: List, timings: Dict) -> List[Dict]:
+        for stage, (wall, cpu) in timings.items():
+            metrics.add(stage, wall, cpu, lang_code=lang_code)
+        return [{"key": key, "value": english_values[key]} for key in untranslated_keys]
+
+    async def fetch_worker():
+        for lang_code in pending:  # the workers share one iterator, each taking the next code
+            await fetched.put((lang_code, await loop.run_in_executor(fetch_pool, fetch, lang_code)))
+
+    async def fetch_stage():
+        await asyncio.gather(*(fetch_worker() for _ in range(max(1, workers))))
+        for _ in range(analyzers):
+            await fetched.put(None)
+
+    async def analyze_worker():
+        while (item := await fetched.get()) is not None:
+            lang_code, xml_string = item
+            untranslated_terms = None
+            if xml_string:
+                untranslated_keys, timings, counts = await loop.run_in_executor(
+                    analyze_pool, _analyze_in_worker, xml_string)
+                for name, n in counts.items():
+                    metrics.count(name, n)
+                untranslated_terms = untranslated_with_values(lang_code, untranslated_keys, timings)
+            await analyzed.put((lang_code, untranslated_terms))
+
+    async def analyze_stage():
+        # Cached terms skip the parse but are still compared off the event loop
+        for lang_code, terms in parsed:
+            untranslated_keys, timings = await loop.run_in_executor(analyze_pool, _compare_in_worker, terms)
+            await analyzed.put((lang_code, untranslated_with_values(lang_code, untranslated_keys, timings)))
+        await asyncio.gather(*(analyze_worker() for _ in range(analyzers)))
+        await analyzed.put(None)
+
+    async def result_stage():
+        while (item := await analyzed.get()) is not None:
+            await loop.run_in_executor(result_pool, on_result, *item)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as fetch_pool, analyze_pool, \
+            ThreadPoolExecutor(max_workers=1) as result_pool:
+        await asyncio.gather(fetch_stage(), analyze_stage(), result_stage())
+
+def main(argv: List[str] | None = None):
+    args = parse_args(argv)
+    # A recording needs every response in full, not 304s against the cache
+    cache_dir = None if args.no_cache or args.record else args.cache_dir
+    stats_db = open_stats_db(args.db) if args.db else None
+    if args.regressions is not None:
+        if stats_db is None:
+            print("--regressions needs --db. Exiting.")
+            return
+        since = (datetime.now(timezone.utc) - timedelta(days=args.regressions)).isoformat(timespec="seconds")
+        regressions = find_regressions(stats_db, since)
+        for lang_code, first_percentage, last_percentage in regressions:
+            print(f"{get_language_name(lang_code)} ({lang_code}): {first_percentage:.1f}% -> {last_percentage:.1f}%")
+        print(f"{len(regressions)} locales regressed in the last {args.regressions} days.")
+        return
+    if args.backfill:
+        commits = backfill_history(args.backfill, args.backfill_ref, args.backfill_weekly, args.parser,
+                                   cache_dir, args.backfill_output, stats_db)
+        if cache_dir:
+            prune_parse_cache(cache_dir, args.parse_cache_size)
+        print(f"Wrote translation status for {commits} commits to '{args.backfill_output}'.")
+        return
+    metrics = RunMetrics()
+    sampler = None
+    if args.profile:
+        if args.processes:
+            print("Profiling only sees this process; parsing and comparing in-process instead of in workers.")
+            args.processes = 0
+        sampler = StackSampler()
+        sampler.start()
+    scheduler = RequestScheduler(args.rate, args.burst, args.retries)
+    recorder = ResponseRecorder() if args.record else None
+    configure_http(args.pool_size or args.workers, (args.connect_timeout, args.read_timeout), cache_dir, scheduler,
+                   args.endpoint, recorder)
+    blob_shas = {}
+    with metrics.stage("discovery") as measure:
+        if args.archive:
+            archive_xml = read_locale_archive(args.archive)
+            locale_codes = sorted(archive_xml)
+            read_xml = archive_xml.get
+        elif args.locales_dir:
+            locale_codes = find_local_locale_codes(args.locales_dir)
+            read_xml = partial(read_local_xml, args.locales_dir)
+        else:
+            if args.discovery == "trees":
+                blob_shas = fetch_locale_tree() or {}
+            locale_codes = sorted(blob_shas) or fetch_locale_codes()
+            read_xml = fetch_xml_content
+        measure["items"] = len(locale_codes)
+        measure["bytes"] = scheduler.bytes_received  # listings and archive downloads
+
+    def fetch(lang_code: str) -> str | None:
+        with metrics.stage("fetch", lang_code=lang_code) as measure:
+            xml_string = read_xml(lang_code)
+            measure["bytes"] = len(xml_string.encode("utf-8")) if xml_string else 0
+        # Raw downloads are cached apart from the API and can lag behind the tree for a few minutes;
+        # keep the SHA of what was analyzed so a stale copy is fetched again next run instead of reused
+        if xml_string and lang_code in blob_shas:
+            content_sha = git_blob_sha(xml_string)
+            if content_sha != blob_shas[lang_code]:
+                print(f"Downloaded {lang_code} is blob {content_sha[:7]}, not {blob_shas[lang_code][:7]} "
+                      f"as listed; it will be fetched again next run.")
+                blob_shas[lang_code] = content_sha
+        return xml_string
+
+    if not locale_codes or "en-US" not in locale_codes:
+        print("No locales or en-US missing. Exiting.")
+        return
+    manifest = load_manifest()
+    # Locales whose blob SHA and the en-US blob SHA match the last run are reused as they are:
+    # no download, parse, comparison or page rendering
+    reused = {}
+    total_terms, previous = load_previous_results()
+    english_sha = blob_shas.get("en-US")
+    # Like the parse cache, result reuse is off with --no-cache and --record
+    if english_sha and manifest.get("english_blob") == english_sha and cache_dir:
+        for lang_code, result in previous.items():
+            entry = manifest["locales"].get(lang_code)
+            page_input = _page_input(result["language"], total_terms, result["untranslated_terms"])
+            if (entry and entry.get("blob") == blob_shas.get(lang_code) and (
+                    args.site != "static"
+                    or page_is_current(entry, page_input, f"docs/locales/locale_{lang_code}.html"))):
+                reused[lang_code] = result
+    results = list(reused.values())
+    other_codes = [code for code in locale_codes if code != "en-US" and code not in reused]
+    if reused:
+        print(f"Reusing results for {len(reused)} locales with unchanged blob SHAs.")
+    rendered_pages = 0
+    failed = []
+    if other_codes or not reused:
+        # Locales whose blob SHA was parsed before need neither a download nor a parse
+        cached_terms = {}
+        if cache_dir:
+            for lang_code in other_codes + ["en-US"]:
+                terms = load_cached_terms(cache_dir, blob_shas[lang_code]) if lang_code in blob_shas else None
+                if terms is not None:
+                    cached_terms[lang_code] = terms
+            metrics.count("parse_cache_hits", len(cached_terms))
+        if "en-US" in cached_terms:
+            english_terms = cached_terms.pop("en-US")
+        else:
+            english_xml = fetch("en-US")
+            parse_counts = {}
+            with metrics.stage("parse", lang_code="en-US"):
+                english_terms = load_locale_terms(english_xml, PARSERS[args.parser], cache_dir, parse_counts)
+            for name, n in parse_counts.items():
+                metrics.count(name, n)
+        if not english_terms:
+            print("Could not load the en-US terms. Exiting.")
+            raise SystemExit(1)
+        total_terms = len(english_terms)
+        with metrics.stage("compare", items=0):
+            reference = build_reference_index(english_terms)
+        if cached_terms:
+            print(f"Reusing {len(cached_terms)} parsed locales from the cache.")
+
+        def handle_result(lang_code: str, untranslated_terms: List[Dict] | None):
+            nonlocal rendered_pages
+            if untranslated_terms is None:
+                failed.append(lang_code)
+                return
+            result = build_result(lang_code, untranslated_terms, total_terms)
+            lang_name = result["language"]
+            results.append(result)
+            page_entry = manifest["locales"].setdefault(lang_code, {})
+            page_entry["blob"] = blob_shas.get(lang_code)
+            if args.site != "static":
+                return
+            page_input = _page_input(lang_name, total_terms, untranslated_terms)
+            page_path = f"docs/locales/locale_{lang_code}.html"
+            if not page_is_current(page_entry, page_input, page_path):
+                with metrics.stage("render", lang_code=lang_code):
+                    page_html = render_locale_page(lang_code, lang_name, untranslated_terms, total_terms)
+                with metrics.stage("write", lang_code=lang_code) as measure:
+                    write_page(page_path, page_html)
+                    measure["bytes"] = len(page_html.encode("utf-8"))
+                page_entry.update(input=page_input, output=_sha256(page_html))
+                rendered_pages += 1
+
+        to_fetch = [code for code in other_codes if code not in cached_terms]
+        with metrics.stage("pipeline", items=len(other_codes)):
+            asyncio.run(run_pipeline(to_fetch, fetch, reference, handle_result, cached_terms.items(), args.parser,
+                                     cache_dir, args.workers, args.processes, metrics=metrics))
+    # A locale that could not be downloaded keeps last run's numbers rather than vanishing from the index
+    missing = []
+    for lang_code in sorted(failed):
+        if lang_code in previous:
+            print(f"Keeping the previous results for {lang_code}, which could not be fetched.")
+            results.append(previous[lang_code])
+            manifest["locales"].get(lang_code, {}).pop("blob", None)  # force a retry next run
+        else:
+            missing.append(lang_code)
+    if missing:
+        print(f"Could not fetch {', '.join(missing)} and no earlier results exist. Not updating the index.")
+        raise SystemExit(1)
+    manifest["english_blob"] = blob_shas.get("en-US")
+    if cache_dir:
+        prune_parse_cache(cache_dir, args.parse_cache_size)
+    # Downloads complete in arbitrary order; break percentage ties by code to keep the index stable
+    results.sort(key=lambda x: (-x["percentage"], x["lang_code"]))
+    outputs = ["docs/index.html", SUMMARY_JSON_PATH, TERMS_NDJSON_PATH]
+    with metrics.stage("write", items=2) as measure:
+        export_results(results, total_terms)
+        measure["bytes"] = sum(os.path.getsize(path) for path in outputs[1:])
+    if args.site == "app":
+        with metrics.stage("write"):
+            write_if_changed("docs/index.html", APP_SHELL)
+            precompress_file(SUMMARY_JSON_PATH)
+            removed = remove_locale_pages(manifest)
+        print(f"App 'docs/index.html' and '{SUMMARY_JSON_PATH}' written with {len(results)} locales.")
+        if removed:
+            print(f"Removed {removed} static locale pages left from an earlier run.")
+    else:
+        print(f"Rendered {rendered_pages} of {len(results)} locale pages; the others were unchanged.")
+        index_input = _digest([PAGE_TEMPLATE_VERSION] + [
+            [res["lang_code"], res["language"], res["translated_count"], res["untranslated_count"], res["percentage"]]
+            for res in results])
+        if page_is_current(manifest["index"], index_input, "docs/index.html"):
+            print("HTML file 'docs/index.html' is unchanged.")
+        else:
+            with metrics.stage("render_index"):
+                index_html = render_index_page(results)
+            with metrics.stage("write") as measure:
+                write_page("docs/index.html", index_html)
+                measure["bytes"] = len(index_html.encode("utf-8"))
+            manifest["index"] = {"input": index_input, "output": _sha256(index_html)}
+            print(f"HTML file 'docs/index.html' generated with {len(results)} locales.")
+        outputs += [f"docs/locales/locale_{res['lang_code']}.html" for res in results]
+    with metrics.stage("write"):
+        save_manifest(manifest)
+    if args.precompress:
+        with metrics.stage("precompress", items=len(outputs)):
+            compressed = sum(precompress_file(path) for path in outputs)
+        print(f"Precompressed {compressed} of {len(outputs)} output files; the others were up to date.")
+    if scheduler.requests:
+        print("HTTP requests: {requests}, retries: {retries}, failures: {failures}, "
+              "throttled: {throttled_seconds}s".format(**scheduler.state()))
+    if recorder is not None:
+        recorder.save(args.record)
+        print(f"Recorded {len(recorder.responses)} HTTP responses to '{args.record}'.")
+    if sampler is not None:
+        sampler.stop()
+        profile_files = sampler.write(args.profile)
+        print(f"Wrote {len(profile_files)} profile files to '{args.profile}'.")
+    report_extra = {"http": scheduler.state(), "counts": {
+        "locales": len(locale_codes), "reused": len(reused), "failed": len(failed), "rendered_pages": rendered_pages}}
+    if args.prometheus_file:
+        # Written atomically so the collector never reads a half-written file
+        os.makedirs(os.path.dirname(args.prometheus_file) or ".", exist_ok=True)
+        _write_atomic(args.prometheus_file,
+                      format_prometheus(metrics.report(**report_extra), results, total_terms).encode("utf-8"))
+    if args.report:
+        write_run_report(metrics, args.report, **report_extra)
+        print("Stage times: " + ", ".join(f"{stage} {totals['wall_seconds']:.2f}s"
+                                          for stage, totals in metrics.stages.items()))
+    if stats_db is not None:
+        record_run(stats_db, results, total_terms, source=args.archive or args.locales_dir or "github")
+        stats_db.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,177 @@
+import argparse
+import base64
+import gzip
+import json
+import random
+import signal
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+# Statuses returned for injected server errors, one picked at random
+ERROR_STATUSES = [500, 502, 503, 504]
+
+def load_snapshot(path: str) -> Dict[str, Dict]:
+    """Read a snapshot written by `csl-translation-status-output.py --record` as {path: response}."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    responses = {}
+    for entry in snapshot["responses"]:
+        if "body_base64" in entry:
+            body = base64.b64decode(entry["body_base64"])
+        else:
+            body = entry["body"].encode("utf-8")
+        responses[entry["path"]] = {"status": entry["status"], "headers": entry["headers"], "body": body}
+    return responses
+
+class ReplayState:
+    """Snapshot, fault settings and counters shared by all request handler threads."""
+
+    def __init__(self, responses: Dict[str, Dict], args: argparse.Namespace):
+        self.responses = responses
+        self.latency = args.latency / 1000
+        self.jitter = args.jitter / 1000
+        self.not_modified = not args.no_304
+        self.rate_limit = args.rate_limit
+        self.rate_limit_window = args.rate_limit_window
+        self.error_rate = args.error_rate
+        self.fail_first = args.fail_first
+        self.random = random.Random(args.seed)
+        self.counts: Dict[int, int] = {}
+        self._window_start = time.time()
+        self._window_requests = 0
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def injected_error(self) -> int | None:
+        """Return a 5xx status for this request, or None, according to --fail-first and --error-rate."""
+        with self._lock:
+            self._requests += 1
+            if self._requests <= self.fail_first:
+                return 503
+            return self.random.choice(ERROR_STATUSES) if self.random.random() < self.error_rate else None
+
+    def take_request(self) -> Tuple[Dict[str, str], bool]:
+        """Count a request against the rate limit; returns the X-RateLimit-* headers and whether it is exceeded."""
+        if not self.rate_limit:
+            return {}, False
+        with self._lock:
+            now = time.time()
+            if now >= self._window_start + self.rate_limit_window:
+                self._window_start = now
+                self._window_requests = 0
+            self._window_requests += 1
+            headers = {"X-RateLimit-Limit": str(self.rate_limit),
+                       "X-RateLimit-Remaining": str(max(self.rate_limit - self._window_requests, 0)),
+                       "X-RateLimit-Reset": str(int(self._window_start + self.rate_limit_window)),
+                       "X-RateLimit-Used": str(min(self._window_requests, self.rate_limit))}
+            return headers, self._window_requests > self.rate_limit
+
+    def count(self, status: int):
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like GitHub
+    state: ReplayState
+    quiet = False
+
+    def do_GET(self):
+        state = self.state
+        time.sleep(state.delay())
+        headers, limited = state.take_request()
+        if limited:
+            self.send(403, headers, b'{"message": "API rate limit exceeded"}', "application/json")
+            return
+        error = state.injected_error()
+        if error:
+            self.send(error, headers, b"Injected server error", "text/plain")
+            return
+        entry = state.responses.get(self.path)
+        if entry is None:
+            self.send(404, headers, b"Not in snapshot", "text/plain")
+            return
+        headers = {**entry["headers"], **headers}
+        if state.not_modified and entry["status"] == 200 and self.is_not_modified(entry["headers"]):
+            self.send(304, headers, b"")
+            return
+        self.send(entry["status"], headers, entry["body"])
+
+    def is_not_modified(self, headers: Dict[str, str]) -> bool:
+        etag = self.headers.get("If-None-Match")
+        if etag and "ETag" in headers:
+            return etag == headers["ETag"]
+        since = self.headers.get("If-Modified-Since")
+        return bool(since) and since == headers.get("Last-Modified")
+
+    def send(self, status: int, headers: Dict[str, str], body: bytes, content_type: str | None = None):
+        self.state.count(status)
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Date", formatdate(usegmt=True))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serve a snapshot recorded with --record as a local stand-in for GitHub. Point "
+                    "csl-translation-status-output.py at it with --endpoint http://HOST:PORT.")
+    parser.add_argument("snapshot", help="gzipped JSON snapshot written by --record")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    parser.add_argument("--latency", type=float, default=0, metavar="MS",
+                        help="delay before every response, in milliseconds (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0, metavar="MS",
+                        help="random +/- variation of --latency, in milliseconds (default: 0)")
+    parser.add_argument("--no-304", action="store_true",
+                        help="always send full responses instead of 304 for matching If-None-Match/If-Modified-Since")
+    parser.add_argument("--rate-limit", type=int, default=0, metavar="N",
+                        help="answer 403 with X-RateLimit-Remaining: 0 after N requests per window (default: off)")
+    parser.add_argument("--rate-limit-window", type=float, default=60, metavar="SECONDS",
+                        help="length of a rate limit window; X-RateLimit-Reset points at its end (default: 60)")
+    parser.add_argument("--error-rate", type=float, default=0, metavar="P",
+                        help="share of requests answered with a random 5xx error (default: 0)")
+    parser.add_argument("--fail-first", type=int, default=0, metavar="N",
+                        help="answer the first N requests with 503, for reproducible retries (default: 0)")
+    parser.add_argument("--seed", type=int, help="random seed for jitter and errors, for reproducible runs")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] | None = None):
+    args = parse_args(argv)
+    responses = load_snapshot(args.snapshot)
+    ReplayHandler.state = ReplayState(responses, args)
+    ReplayHandler.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), ReplayHandler)
+    server.daemon_threads = True
+    print(f"Replaying {len(responses)} responses on http://{args.host}:{server.server_port}", flush=True)
+    # Stop cleanly (and print the summary) when a benchmark script terminates the server
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        counts = ReplayHandler.state.counts
+        print("Responses sent: " + (", ".join(f"{status}: {n}" for status, n in sorted(counts.items())) or "none"))
+
+if __name__ == "__main__":
+    main()
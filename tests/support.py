@@ -0,0 +1,14 @@
+"""Shared by the tests: the scripts under test, loaded as modules."""
+import importlib.util
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(name: str, file_name: str):
+    # The scripts have hyphenated file names, so they are loaded by path rather than imported
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+status = load_script("csl_translation_status", "csl-translation-status-output.py")
@@ -0,0 +1,82 @@
+"""--backfill against a small throwaway locales repository."""
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+from support import status
+
+def locale_xml(lang_code: str, terms: dict) -> str:
+    body = "".join(f'<term name="{name}">{value}</term>' for name, value in terms.items())
+    return (f'<?xml version="1.0" encoding="utf-8"?><locale xmlns="http://purl.org/net/xbiblio/csl" '
+            f'version="1.0" xml:lang="{lang_code}"><terms>{body}</terms></locale>')
+
+ENGLISH = {"and": "and", "page": "page", "editor": "editor"}
+ENGLISH_V2 = ENGLISH | {"page": "p."}
+
+class BackfillTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix="csl-backfill-")
+        self.repo = os.path.join(self._tmp.name, "locales")
+        self.git("init", "-q", "-b", "master", self.repo, cwd=self._tmp.name)
+        # Monday, Tuesday and the Monday after: the first two share an ISO week
+        self.commit("2024-01-01T12:00:00+00:00", {"en-US": ENGLISH, "de-DE": ENGLISH | {"and": "und"}})
+        self.commit("2024-01-02T12:00:00+00:00", {"de-DE": ENGLISH | {"and": "und", "page": "Seite"},
+                                                   "fr-FR": ENGLISH | {"and": "et"}})
+        self.commit("2024-01-08T12:00:00+00:00", {"en-US": ENGLISH_V2})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def git(self, *args: str, cwd: str | None = None, env: dict | None = None) -> str:
+        return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+                              cwd=cwd or self.repo, env=env, check=True, capture_output=True, text=True).stdout
+
+    def commit(self, date: str, locales: dict):
+        for lang_code, terms in locales.items():
+            with open(os.path.join(self.repo, f"locales-{lang_code}.xml"), "w", encoding="utf-8") as f:
+                f.write(locale_xml(lang_code, terms))
+        self.git("add", "-A")
+        env = os.environ | {"GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+        self.git("commit", "-q", "-m", f"Update {', '.join(locales)}", env=env)
+
+    def backfill(self, weekly: bool = False) -> tuple:
+        """Return the number of commits processed and the NDJSON records written."""
+        output_path = os.path.join(self._tmp.name, "history.ndjson")
+        processed = status.backfill_history(self.repo, weekly=weekly, output_path=output_path)
+        with open(output_path, encoding="utf-8") as f:
+            return processed, [json.loads(line) for line in f]
+
+    def test_read_tree_locales(self):
+        os.makedirs(os.path.join(self.repo, "locales-xx-XX.xml"))  # a directory, not a locale
+        with open(os.path.join(self.repo, "locales-xx-XX.xml", "README"), "w") as f:
+            f.write("not a locale\n")
+        with open(os.path.join(self.repo, "locales.json"), "w") as f:
+            f.write("{}\n")
+        self.commit("2024-01-09T12:00:00+00:00", {})
+        tree = subprocess.run(["git", "-C", self.repo, "cat-file", "tree", "HEAD^{tree}"],
+                              check=True, capture_output=True).stdout
+        expected = {lang_code: self.git("rev-parse", f"HEAD:locales-{lang_code}.xml").strip()
+                    for lang_code in ("de-DE", "en-US", "fr-FR")}
+        self.assertEqual(status.read_tree_locales(tree), expected)
+
+    def test_every_commit(self):
+        processed, records = self.backfill()
+        self.assertEqual(processed, 3)
+        counts = [(record["date"][:10], record["lang_code"], record["translated_count"]) for record in records]
+        self.assertEqual(counts, [
+            ("2024-01-01", "de-DE", 1),
+            ("2024-01-02", "de-DE", 2), ("2024-01-02", "fr-FR", 1),
+            # fr-FR still says "page", which is no longer the English value
+            ("2024-01-08", "de-DE", 2), ("2024-01-08", "fr-FR", 2),
+        ])
+
+    def test_weekly(self):
+        processed, records = self.backfill(weekly=True)
+        self.assertEqual(processed, 2)
+        self.assertEqual(sorted({record["date"][:10] for record in records}), ["2024-01-02", "2024-01-08"])
+
+if __name__ == "__main__":
+    unittest.main()
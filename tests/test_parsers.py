@@ -0,0 +1,72 @@
+"""The DOM and streaming parsers must select exactly the same terms."""
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from support import status
+
+LOCALE = """<?xml version="1.0" encoding="utf-8"?>
+<locale xmlns="http://purl.org/net/xbiblio/csl" version="1.0" xml:lang="de-DE">
+  <info>
+    <translator><name>Someone</name></translator>
+    <updated>2024-01-01T00:00:00+00:00</updated>
+  </info>
+  <style-options punctuation-in-quote="false"/>
+  <date form="text">
+    <date-part name="day" suffix=". "/>
+    <date-part name="month"/>
+  </date>
+  <terms>
+    <!-- a comment between terms -->
+    <term name="accessed">zugegriffen</term>
+    <term name="and">und</term>
+    <term name="editor" form="short">
+      <single>Hrsg.</single>
+      <multiple>Hrsg.</multiple>
+    </term>
+    <term name="page">
+      <single>Seite</single>
+      <multiple>Seiten</multiple>
+    </term>
+    <term name="month-01" gender="masculine">Januar</term>
+    <term name="ordinal"><![CDATA[.]]></term>
+    <term name="empty"></term>
+    <term name="spaced">   im   </term>
+  </terms>
+  <terms>
+    <term name="second-section">zweiter Abschnitt</term>
+  </terms>
+  <info>
+    <term name="not-a-term">outside terms</term>
+  </info>
+</locale>
+"""
+
+class ParserEquivalenceTest(unittest.TestCase):
+
+    def parse_both(self, xml_string: str):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return status.parse_locale_terms(xml_string), status.parse_locale_terms_streaming(xml_string)
+
+    def test_same_terms(self):
+        dom, stream = self.parse_both(LOCALE)
+        self.assertEqual(stream, dom)
+        self.assertEqual(dom[("editor", "short")], ("Hrsg.", "Hrsg."))
+        self.assertEqual(dom[("spaced", "")], "im")
+        self.assertIn(("second-section", ""), dom)
+        self.assertNotIn(("not-a-term", ""), dom)
+
+    def test_same_terms_across_chunk_boundaries(self):
+        dom = status.parse_locale_terms(LOCALE)
+        for chunk_size in (1, 7, 64):
+            with self.subTest(chunk_size=chunk_size), mock.patch.object(status, "PARSE_CHUNK_SIZE", chunk_size):
+                self.assertEqual(status.parse_locale_terms_streaming(LOCALE), dom)
+
+    def test_invalid_xml(self):
+        for xml_string in ("", "<locale><terms>", "not xml at all"):
+            with self.subTest(xml_string=xml_string):
+                self.assertEqual(self.parse_both(xml_string), ({}, {}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""Drive main() through the replay server: retries, rate limits, fallbacks and blob-SHA reuse.
+
+Run with `python -m unittest discover -s tests`. No network access is needed.
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer
+from typing import Dict, List
+
+from support import load_script, status
+
+replay = load_script("csl_translation_status_replay", "csl-translation-status-replay-server.py")
+
+TREE_PATH = "/repos/citation-style-language/locales/git/trees/master"
+RAW_PATH = "/citation-style-language/locales/master/locales-{}.xml"
+TERM_NAMES = [f"term-{i}" for i in range(10)]
+
+def locale_xml(lang_code: str, translated: int) -> str:
+    """A CSL locale whose first `translated` terms differ from en-US."""
+    terms = "".join(f'<term name="{name}">{lang_code if i < translated else "en"} {name}</term>'
+                    for i, name in enumerate(TERM_NAMES))
+    return (f'<?xml version="1.0" encoding="utf-8"?><locale xmlns="http://purl.org/net/xbiblio/csl" '
+            f'version="1.0" xml:lang="{lang_code}"><terms>{terms}</terms></locale>')
+
+def write_snapshot(path: str, locales: Dict[str, str], tree: Dict[str, str] | None = None,
+                   missing: List[str] = ()):
+    """Write a --record style snapshot serving `locales`; `tree` overrides listed blob SHAs."""
+    shas = {lang_code: status.git_blob_sha(xml) for lang_code, xml in locales.items()} | (tree or {})
+    listing = {"truncated": False, "tree": [{"path": f"locales-{lang_code}.xml", "type": "blob", "sha": sha}
+                                            for lang_code, sha in sorted(shas.items())]}
+    responses = [{"path": TREE_PATH, "status": 200, "headers": {"Content-Type": "application/json"},
+                  "body": json.dumps(listing)}]
+    for lang_code, xml in locales.items():
+        if lang_code not in missing:
+            responses.append({"path": RAW_PATH.format(lang_code), "status": 200,
+                              "headers": {"ETag": f'"{status.git_blob_sha(xml)}"'}, "body": xml})
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"responses": responses}, f)
+
+class ReplayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix="csl-replay-")
+        self.workdir = self._tmp.name
+        self.snapshot = os.path.join(self.workdir, "snapshot.json.gz")
+        self.locales = {"en-US": locale_xml("en-US", 0), "de-DE": locale_xml("de-DE", 8),
+                        "fr-FR": locale_xml("fr-FR", 5)}
+        self.server = None
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.workdir)
+
+    def tearDown(self):
+        os.chdir(self.previous_cwd)
+        self.stop_server()
+        self._tmp.cleanup()
+
+    def start_server(self, *options: str):
+        self.stop_server()
+        args = replay.parse_args([self.snapshot, "--port", "0", "--quiet", *options])
+        handler = type("Handler", (replay.ReplayHandler,), {
+            "state": replay.ReplayState(replay.load_snapshot(self.snapshot), args), "quiet": True})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def run_main(self, *options: str) -> Dict:
+        """Run the script against the server; returns its run report with the printed output added."""
+        output = io.StringIO()
+        argv = ["--endpoint", f"http://127.0.0.1:{self.server.server_port}", "--cache-dir", ".cache",
+                "--report", "run-report.json", *options]
+        with contextlib.redirect_stdout(output):
+            status.main(argv)
+        with open("run-report.json", encoding="utf-8") as f:
+            report = json.load(f)
+        report["output"] = output.getvalue()
+        return report
+
+    def summary(self) -> Dict[str, Dict]:
+        with open(status.SUMMARY_JSON_PATH, encoding="utf-8") as f:
+            return {locale["lang_code"]: locale for locale in json.load(f)["locales"]}
+
+    def test_server_error_is_retried(self):
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server("--fail-first", "1")
+        report = self.run_main()
+        self.assertEqual(report["http"]["retries"], 1)
+        self.assertEqual(report["http"]["statuses"]["503"], 1)
+        self.assertEqual(self.summary()["de-DE"]["translated_count"], 8)
+
+    def test_rate_limit_waits_for_reset(self):
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server("--rate-limit", "2", "--rate-limit-window", "2")
+        # Another client used up the quota, so the first request is refused without a warning
+        for _ in range(2):
+            urllib.request.urlopen(f"http://127.0.0.1:{self.server.server_port}{TREE_PATH}").close()
+        report = self.run_main()
+        self.assertGreaterEqual(report["http"]["statuses"]["403"], 1)
+        self.assertGreaterEqual(report["http"]["retries"], 1)
+        self.assertEqual(report["http"]["failures"], 0)
+        self.assertEqual(sorted(self.summary()), ["de-DE", "fr-FR"])
+
+    def test_unchanged_rerun_reuses_everything(self):
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server()
+        self.run_main()
+        report = self.run_main()
+        self.assertEqual(report["counts"]["reused"], 2)
+        self.assertEqual(report["http"]["requests"], 1)  # only the tree listing
+        self.assertIn("HTML file 'docs/index.html' is unchanged.", report["output"])
+
+    def test_no_cache_downloads_everything(self):
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server()
+        self.run_main()
+        report = self.run_main("--no-cache")
+        self.assertEqual(report["counts"].get("reused", 0), 0)
+        self.assertEqual(report["http"]["requests"], 4)
+
+    def test_changed_locale_is_analyzed_again(self):
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server()
+        self.run_main()
+        self.locales["de-DE"] = locale_xml("de-DE", 10)
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server()
+        report = self.run_main()
+        self.assertEqual(report["counts"]["reused"], 1)
+        self.assertEqual(set(report["locales"]) - {"en-US"}, {"de-DE"})
+        self.assertEqual(self.summary()["de-DE"]["translated_count"], 10)
+
+    def test_failed_locale_keeps_previous_result(self):
+        write_snapshot(self.snapshot, self.locales)
+        self.start_server()
+        self.run_main()
+        self.locales["de-DE"] = locale_xml("de-DE", 10)
+        write_snapshot(self.snapshot, self.locales, missing=["de-DE"])
+        self.start_server()
+        report = self.run_main("--retries", "0")
+        self.assertIn("Keeping the previous results for de-DE", report["output"])
+        self.assertEqual(self.summary()["de-DE"]["translated_count"], 8)
+        with open(status.MANIFEST_PATH, encoding="utf-8") as f:
+            self.assertNotIn("blob", json.load(f)["locales"]["de-DE"])  # retried next run
+
+    def test_failed_locale_without_previous_result_fails_the_run(self):
+        write_snapshot(self.snapshot, self.locales, missing=["de-DE"])
+        self.start_server()
+        with self.assertRaises(SystemExit) as raised:
+            self.run_main("--retries", "0")
+        self.assertEqual(raised.exception.code, 1)
+        self.assertFalse(os.path.exists("docs/index.html"))
+
+    def test_stale_download_is_not_stored_under_the_listed_sha(self):
+        listed_sha = status.git_blob_sha(locale_xml("de-DE", 10))
+        write_snapshot(self.snapshot, self.locales, tree={"de-DE": listed_sha})
+        self.start_server()
+        self.run_main()
+        with open(status.MANIFEST_PATH, encoding="utf-8") as f:
+            stored_sha = json.load(f)["locales"]["de-DE"]["blob"]
+        self.assertEqual(stored_sha, status.git_blob_sha(self.locales["de-DE"]))
+        report = self.run_main()
+        self.assertIn("de-DE", report["locales"])  # downloaded again rather than reused
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""The SQLite statistics store and --regressions."""
+import unittest
+
+from support import status
+
+def result(lang_code: str, translated_count: int, total_terms: int = 10) -> dict:
+    untranslated_terms = [{"key": (f"term-{i}", ""), "value": f"term {i}"}
+                          for i in range(total_terms - translated_count)]
+    return status.build_result(lang_code, untranslated_terms, total_terms)
+
+class RegressionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = status.open_stats_db(":memory:")
+        self.addCleanup(self.conn.close)
+
+    def record(self, run_at: str, translated: dict):
+        status.record_run(self.conn, [result(lang_code, n) for lang_code, n in translated.items()], 10,
+                          run_at=run_at)
+
+    def test_only_drops_since_the_date_are_reported(self):
+        self.record("2024-01-01T00:00:00+00:00", {"de-DE": 10, "fr-FR": 9, "it-IT": 5, "nl-NL": 8})
+        self.record("2024-02-01T00:00:00+00:00", {"de-DE": 9, "fr-FR": 9, "it-IT": 8, "nl-NL": 8})
+        self.record("2024-03-01T00:00:00+00:00", {"de-DE": 9, "fr-FR": 6, "it-IT": 7, "nl-NL": 8})
+        # The first run in the window counts, so de-DE's earlier drop is left out
+        self.assertEqual(status.find_regressions(self.conn, "2024-02-01T00:00:00+00:00"),
+                         [("fr-FR", 90.0, 60.0), ("it-IT", 80.0, 70.0)])
+        self.assertEqual(status.find_regressions(self.conn, "2024-01-01T00:00:00+00:00"),
+                         [("fr-FR", 90.0, 60.0), ("de-DE", 100.0, 90.0)])
+
+    def test_locale_recorded_once_is_not_a_regression(self):
+        self.record("2024-03-01T00:00:00+00:00", {"de-DE": 5})
+        self.assertEqual(status.find_regressions(self.conn, "2024-01-01T00:00:00+00:00"), [])
+
+    def test_same_run_is_stored_once(self):
+        run_at = "2024-03-01T00:00:00+00:00"
+        self.assertIsNotNone(status.record_run(self.conn, [result("de-DE", 5)], 10, run_at=run_at))
+        self.assertIsNone(status.record_run(self.conn, [result("de-DE", 5)], 10, run_at=run_at))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM untranslated_terms").fetchone(), (5,))
+
+if __name__ == "__main__":
+    unittest.main()